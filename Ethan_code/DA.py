@@ -1,154 +1,280 @@
 
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import numpy as np
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.metrics import classification_report
-from sklearn.linear_model import Lasso, Ridge
-from sklearn.model_selection import train_test_split
-
-# Load and prepare data
-model_df = pd.read_csv('attached_assets/combined_dataset.csv')
-model_data = model_df.dropna(subset=['Population', 'Deaths'])
-
-# 1. Correlation Analysis
-plt.figure(figsize=(12, 10))
-correlation_matrix = model_data.corr(numeric_only=True)
-sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", fmt=".2f")
-plt.title("Correlation Matrix of Features")
-plt.tight_layout()
-plt.savefig('Results/correlation_analysis.png')
-plt.close()
-
-# 2. Death Rate Trends
-plt.figure(figsize=(15, 8))
-for region in range(1, 11):
-    region_data = model_data[model_data['Region'] == region]
-    plt.plot(region_data['Year'], region_data['%Death_Rate'], label=f'Region {region}')
-plt.title('Death Rate Trends by Region (2020-2025)')
-plt.xlabel('Year')
-plt.ylabel('Death Rate (%)')
-plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
-plt.savefig('Results/death_rate_trends.png')
-plt.close()
-
-# Regression Analysis
-features = ['%Rep_Leg', '%Dem_Leg', '%Mix_Leg', '%Rep_Gov', '%Dem_Gov', 
+import argparse
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import joblib
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure  # noqa: E402
+import pandas as pd  # noqa: E402
+import numpy as np  # noqa: E402
+from sklearn.linear_model import LinearRegression  # noqa: E402
+from sklearn.preprocessing import StandardScaler  # noqa: E402
+from sklearn.cluster import KMeans  # noqa: E402
+from sklearn.linear_model import Lasso, Ridge  # noqa: E402
+from sklearn.decomposition import PCA  # noqa: E402
+
+# running_stats lives in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from running_stats import RunningStats  # noqa: E402
+
+DATA_PATH = 'attached_assets/combined_dataset.csv'
+RESULTS_DIR = 'Results'
+
+features = ['%Rep_Leg', '%Dem_Leg', '%Mix_Leg', '%Rep_Gov', '%Dem_Gov',
            '%Rep_State', '%Dem_State', '%Mix_State']
-X = model_data[features]
-y = model_data['%Death_Rate']
-
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-reg = LinearRegression()
-reg.fit(X_scaled, y)
-
-lasso = Lasso(alpha=0.1)
-lasso.fit(X_scaled, y)
-
-ridge = Ridge(alpha=0.1)
-ridge.fit(X_scaled, y)
-
-coefficients = pd.DataFrame({
-    'Feature': features,
-    'Linear_Coef': reg.coef_,
-    'Lasso_Coef': lasso.coef_,
-    'Ridge_Coef': ridge.coef_
-}).sort_values('Linear_Coef', ascending=False)
-
-plt.figure(figsize=(15, 8))
-melted_coef = pd.melt(coefficients, id_vars=['Feature'], var_name='Regression_Type', value_name='Coefficient')
-sns.barplot(data=melted_coef, x='Coefficient', y='Feature', hue='Regression_Type')
-plt.title('Political Control Features Impact on Death Rate - Multiple Regression Methods')
-plt.tight_layout()
-plt.savefig('Results/political_impact.png')
-plt.close()
-
-# 4. Regional Analysis
-regional_summary = model_data.groupby('Region').agg({
-    'Deaths': 'sum',
-    'Population': 'mean',
-    '%Death_Rate': 'mean',
-    '%Rep_State': 'mean',
-    '%Dem_State': 'mean'
-}).round(2)
-
-# Plot regional summary
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 12))
-
-regional_summary['%Death_Rate'].plot(kind='bar', ax=ax1)
-ax1.set_title('Average Death Rate by Region')
-ax1.set_xlabel('Region')
-ax1.set_ylabel('Death Rate (%)')
-
-regional_summary[['%Rep_State', '%Dem_State']].plot(kind='bar', ax=ax2)
-ax2.set_title('Average Political Control by Region')
-ax2.set_xlabel('Region')
-ax2.set_ylabel('Percentage')
-ax2.legend(['Republican', 'Democrat'])
-
-plt.tight_layout()
-plt.savefig('Results/regional_analysis.png')
-plt.close()
-
-# Clustering Analysis
-kmeans = KMeans(n_clusters=3, random_state=42)
-model_data['Cluster'] = kmeans.fit_predict(X_scaled)
-
-plt.figure(figsize=(12, 8))
-for cluster in range(3):
-    cluster_data = model_data[model_data['Cluster'] == cluster]
-    plt.scatter(cluster_data['%Rep_State'], cluster_data['%Death_Rate'], 
-                label=f'Cluster {cluster}')
-plt.xlabel('Republican State Control (%)')
-plt.ylabel('Death Rate (%)')
-plt.title('Clusters of Regions by Political Control and Death Rate')
-plt.legend()
-plt.tight_layout()
-plt.savefig('Results/clustering_analysis.png')
-plt.close()
-
-with open('Results/analysis_summary.txt', 'w') as f:
-    f.write("Data Analysis Summary\n")
-    f.write("===================\n\n")
-    f.write("1. Regression Score: {:.3f}\n".format(reg.score(X_scaled, y)))
-    f.write("\n2. Feature Coefficients:\n")
-    f.write(coefficients.to_string())
-    f.write("\n\n3. Regional Summary:\n")
-    f.write(regional_summary.to_string())
-
-#PCA Analysis
-from sklearn.decomposition import PCA
-
-pca = PCA(n_components=2)
-pca_result = pca.fit_transform(X_scaled)
-
-plt.figure(figsize=(12, 8))
-scatter = plt.scatter(pca_result[:, 0], pca_result[:, 1], 
-                     c=model_data['%Death_Rate'], cmap='viridis')
-plt.colorbar(scatter, label='Death Rate (%)')
-first_component = features[np.abs(pca.components_[0]).argmax()]
-second_component = features[np.abs(pca.components_[1]).argmax()]
-
-plt.xlabel(f'{first_component} ({pca.explained_variance_ratio_[0]:.2%} variance explained)')
-plt.ylabel(f'{second_component} ({pca.explained_variance_ratio_[1]:.2%} variance explained)')
-plt.title('PCA of Political Control Features Colored by Death Rate')
-plt.tight_layout()
-plt.savefig('Results/pca_analysis.png')
-plt.close()
-
-components_df = pd.DataFrame(
-    pca.components_,
-    columns=features,
-    index=[first_component, second_component]
-)
-with open('Results/analysis_summary.txt', 'a') as f:
-    f.write("\n\n4. PCA Components:\n")
-    f.write(components_df.to_string())
-
-print("Analysis completed. Results saved in the Results folder.")
+
+
+def snapshot(path=DATA_PATH):
+    """Every table and model result the figures and the summary use, computed once."""
+    # Load and prepare data
+    model_df = pd.read_csv(path)
+    model_data = model_df.dropna(subset=['Population', 'Deaths']).copy()
+
+    # 1. Correlation Analysis, from the frame already loaded for the models below
+    # (mergeable accumulators; equals model_data.corr(numeric_only=True))
+    correlation_matrix = RunningStats.from_chunks([model_data]).corr()
+
+    # Regression Analysis
+    X = model_data[features]
+    y = model_data['%Death_Rate']
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    reg = LinearRegression()
+    reg.fit(X_scaled, y)
+
+    lasso = Lasso(alpha=0.1)
+    lasso.fit(X_scaled, y)
+
+    ridge = Ridge(alpha=0.1)
+    ridge.fit(X_scaled, y)
+
+    coefficients = pd.DataFrame({
+        'Feature': features,
+        'Linear_Coef': reg.coef_,
+        'Lasso_Coef': lasso.coef_,
+        'Ridge_Coef': ridge.coef_
+    }).sort_values('Linear_Coef', ascending=False)
+
+    # 4. Regional Analysis
+    regional_summary = model_data.groupby('Region').agg({
+        'Deaths': 'sum',
+        'Population': 'mean',
+        '%Death_Rate': 'mean',
+        '%Rep_State': 'mean',
+        '%Dem_State': 'mean'
+    }).round(2)
+
+    # Clustering Analysis
+    kmeans = KMeans(n_clusters=3, random_state=42)
+    model_data['Cluster'] = kmeans.fit_predict(X_scaled)
+
+    #PCA Analysis
+    pca = PCA(n_components=2)
+    pca_result = pca.fit_transform(X_scaled)
+    first_component = features[np.abs(pca.components_[0]).argmax()]
+    second_component = features[np.abs(pca.components_[1]).argmax()]
+    components_df = pd.DataFrame(
+        pca.components_,
+        columns=features,
+        index=[first_component, second_component]
+    )
+
+    return {
+        'correlation_matrix': correlation_matrix,
+        'trends': model_data[['Region', 'Year', '%Death_Rate']],
+        'coefficients': coefficients,
+        'regional_summary': regional_summary,
+        'clusters': model_data[['Cluster', '%Rep_State', '%Death_Rate']],
+        'pca_result': pca_result,
+        'pca_ratio': pca.explained_variance_ratio_,
+        'components_df': components_df,
+        'death_rate': model_data['%Death_Rate'].to_numpy(),
+        'reg_score': reg.score(X_scaled, y),
+    }
+
+
+# Figure tasks: each draws on a fresh Figure from the snapshot entries it names,
+# so they can run in any order in separate processes
+
+def correlation_figure(correlation_matrix):
+    import seaborn as sns
+
+    fig = Figure(figsize=(12, 10))
+    ax = fig.subplots()
+    sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
+    ax.set_title("Correlation Matrix of Features")
+    return fig
+
+
+def death_rate_figure(trends):
+    fig = Figure(figsize=(15, 8))
+    ax = fig.subplots()
+    for region in range(1, 11):
+        region_data = trends[trends['Region'] == region]
+        ax.plot(region_data['Year'], region_data['%Death_Rate'], label=f'Region {region}')
+    ax.set_title('Death Rate Trends by Region (2020-2025)')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Death Rate (%)')
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    return fig
+
+
+def political_impact_figure(coefficients):
+    import seaborn as sns
+
+    fig = Figure(figsize=(15, 8))
+    ax = fig.subplots()
+    melted_coef = pd.melt(coefficients, id_vars=['Feature'], var_name='Regression_Type', value_name='Coefficient')
+    sns.barplot(data=melted_coef, x='Coefficient', y='Feature', hue='Regression_Type', ax=ax)
+    ax.set_title('Political Control Features Impact on Death Rate - Multiple Regression Methods')
+    return fig
+
+
+def regional_figure(regional_summary):
+    fig = Figure(figsize=(12, 12))
+    ax1, ax2 = fig.subplots(2, 1)
+
+    regional_summary['%Death_Rate'].plot(kind='bar', ax=ax1)
+    ax1.set_title('Average Death Rate by Region')
+    ax1.set_xlabel('Region')
+    ax1.set_ylabel('Death Rate (%)')
+
+    regional_summary[['%Rep_State', '%Dem_State']].plot(kind='bar', ax=ax2)
+    ax2.set_title('Average Political Control by Region')
+    ax2.set_xlabel('Region')
+    ax2.set_ylabel('Percentage')
+    ax2.legend(['Republican', 'Democrat'])
+    return fig
+
+
+def clustering_figure(clusters):
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    for cluster in range(3):
+        cluster_data = clusters[clusters['Cluster'] == cluster]
+        ax.scatter(cluster_data['%Rep_State'], cluster_data['%Death_Rate'],
+                   label=f'Cluster {cluster}')
+    ax.set_xlabel('Republican State Control (%)')
+    ax.set_ylabel('Death Rate (%)')
+    ax.set_title('Clusters of Regions by Political Control and Death Rate')
+    ax.legend()
+    return fig
+
+
+def pca_figure(pca_result, pca_ratio, components_df, death_rate):
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    scatter = ax.scatter(pca_result[:, 0], pca_result[:, 1],
+                         c=death_rate, cmap='viridis')
+    fig.colorbar(scatter, ax=ax, label='Death Rate (%)')
+    first_component, second_component = components_df.index
+
+    ax.set_xlabel(f'{first_component} ({pca_ratio[0]:.2%} variance explained)')
+    ax.set_ylabel(f'{second_component} ({pca_ratio[1]:.2%} variance explained)')
+    ax.set_title('PCA of Political Control Features Colored by Death Rate')
+    return fig
+
+
+FIGURES = {
+    'correlation_analysis.png': correlation_figure,
+    'death_rate_trends.png': death_rate_figure,
+    'political_impact.png': political_impact_figure,
+    'regional_analysis.png': regional_figure,
+    'clustering_analysis.png': clustering_figure,
+    'pca_analysis.png': pca_figure,
+}
+
+
+def _render(fn, inputs, path):
+    fig = fn(**inputs)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+def write_summary(snap, path):
+    with open(path, 'w') as f:
+        f.write("Data Analysis Summary\n")
+        f.write("===================\n\n")
+        f.write("1. Regression Score: {:.3f}\n".format(snap['reg_score']))
+        f.write("\n2. Feature Coefficients:\n")
+        f.write(snap['coefficients'].to_string())
+        f.write("\n\n3. Regional Summary:\n")
+        f.write(snap['regional_summary'].to_string())
+        f.write("\n\n4. PCA Components:\n")
+        f.write(snap['components_df'].to_string())
+
+
+def build_report(path=DATA_PATH, results_dir=RESULTS_DIR, max_workers=None, force=False):
+    """
+    Renders every figure in FIGURES into results_dir in a process pool, then
+    writes analysis_summary.txt. A figure is skipped when its file exists and
+    the hash of its task's source and snapshot inputs matches the last run
+    (kept in results_dir/.figure_hashes.json). Returns the names rendered by
+    this call; if any figure fails, the others are still rendered and recorded,
+    and a RuntimeError naming every failure is raised from the first one.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    snap = snapshot(path)
+
+    manifest_path = os.path.join(results_dir, '.figure_hashes.json')
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    tasks = {}
+    for name, fn in FIGURES.items():
+        inputs = {arg: snap[arg] for arg in inspect.signature(fn).parameters}
+        digest = joblib.hash((inspect.getsource(fn), inputs))
+        if force or manifest.get(name) != digest or not os.path.exists(os.path.join(results_dir, name)):
+            tasks[name] = (fn, inputs, digest)
+
+    rendered, errors = [], {}
+    if tasks:
+        with ProcessPoolExecutor(max_workers=min(len(tasks), max_workers or os.cpu_count())) as pool:
+            futures = {pool.submit(_render, fn, inputs, os.path.join(results_dir, name)): name
+                       for name, (fn, inputs, _) in tasks.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                if future.exception() is not None:
+                    errors[name] = future.exception()
+                    continue
+                rendered.append(name)
+                manifest[name] = tasks[name][2]
+                with open(manifest_path, 'w') as f:
+                    json.dump(manifest, f, indent=2)
+
+    write_summary(snap, os.path.join(results_dir, 'analysis_summary.txt'))
+    print(f"{len(rendered)} figures rendered, {len(FIGURES) - len(tasks)} unchanged"
+          + (f", {len(errors)} failed: {', '.join(errors)}" if errors else ''))
+    if errors:
+        # figures that did render keep their hashes, so a re-run only retries the failures
+        failures = '; '.join(f'{name}: {type(e).__name__}: {e}' for name, e in errors.items())
+        first = next(iter(errors.values()))
+        raise RuntimeError(f"{len(errors)} of {len(tasks)} figures failed ({failures})") from first
+    # in FIGURES order rather than completion order
+    return [name for name in FIGURES if name in rendered]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Correlation, regression, clustering and PCA figures')
+    parser.add_argument('path', nargs='?', default=DATA_PATH)
+    parser.add_argument('-o', '--results-dir', default=RESULTS_DIR)
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--force', action='store_true', help='re-render figures even if their inputs are unchanged')
+    args = parser.parse_args(argv)
+
+    build_report(args.path, args.results_dir, args.jobs, args.force)
+    print("Analysis completed. Results saved in the Results folder.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# artifact_cache.py
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+
+CACHE_DIR = '.cache'
+
+# pipeline stages run in threads and share the digest index
+_INDEX_LOCK = threading.Lock()
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def file_digest(path: str, cache_dir: str = CACHE_DIR) -> str:
+    """
+    sha256 of a file's contents. Digests are remembered per (size, mtime) so an
+    unchanged file is not re-read on the next run. A directory (say, a folder
+    of rendered PNGs) hashes its sorted entry names and their digests.
+    """
+    if os.path.isdir(path):
+        # a directory's mtime misses edits to the files inside it, so it is never remembered itself
+        h = hashlib.sha256()
+        for entry in sorted(os.listdir(path)):
+            h.update(entry.encode())
+            h.update(file_digest(os.path.join(path, entry), cache_dir).encode())
+        return h.hexdigest()
+
+    stat = os.stat(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    index_path = os.path.join(cache_dir, 'digests.json')
+    with _INDEX_LOCK:
+        entry = _read_index(index_path).get(os.path.abspath(path))
+    if entry is not None and entry['stamp'] == stamp:
+        return entry['digest']
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    digest = h.hexdigest()
+
+    # re-read under the lock so entries other threads added meanwhile are kept, and
+    # replace the file whole so no reader sees it half written
+    with _INDEX_LOCK:
+        index = _read_index(index_path)
+        index[os.path.abspath(path)] = {'stamp': stamp, 'digest': digest}
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f'{index_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, index_path)
+    return digest
+
+
+def _read_index(index_path: str) -> dict:
+    try:
+        with open(index_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def artifact_key(name: str, sources=(), params=None, cache_dir: str = CACHE_DIR) -> str:
+    """Key for an artifact: its name, the digests of its source files and its parameters."""
+    payload = {
+        'name': name,
+        'sources': [file_digest(s, cache_dir) for s in sources],
+        'params': params or {},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _artifact_path(name: str, key: str, cache_dir: str) -> str:
+    ext = 'parquet' if _parquet_available() else 'pkl'
+    return os.path.join(cache_dir, f'{name}-{key[:16]}.{ext}')
+
+
+def load_frame(name: str, key: str, cache_dir: str = CACHE_DIR):
+    """Returns the cached DataFrame for (name, key), or None on a miss."""
+    path = _artifact_path(name, key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def save_frame(df: pd.DataFrame, name: str, key: str, cache_dir: str = CACHE_DIR) -> str:
+    """Writes df to the cache (Parquet, or pickle without pyarrow) and returns its path."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _artifact_path(name, key, cache_dir)
+    tmp = path + '.tmp'
+    if path.endswith('.parquet'):
+        df.to_parquet(tmp)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def cached_frame(name: str, build, sources=(), params=None, cache_dir: str = CACHE_DIR):
+    """
+    Returns (df, key). Loads the artifact for the current sources/params if it
+    exists, otherwise calls build() and stores the result.
+    """
+    key = artifact_key(name, sources, params, cache_dir)
+    df = load_frame(name, key, cache_dir)
+    if df is None:
+        df = build()
+        save_frame(df, name, key, cache_dir)
+    return df, key
@@ -0,0 +1,235 @@
+# benchmarks/run.py
+"""
+Scaling benchmark for the modelling pipeline on synthetic CDC-schema data.
+
+    python benchmarks/run.py --scales 0.1 1 10
+    python benchmarks/run.py --scales 0.1 --save-baseline
+
+baseline.json holds scales 0.1, 1 and 10. The dense design matrix alone
+peaks near 0.6 GB at 10x and grows linearly, so 100x and 1000x have to be
+run (and baselined) on a host sized for them, or with --sparse.
+
+Every stage records its fastest wall time over --repeats untraced runs and,
+from one more run under tracemalloc, its peak traced allocation; results are
+compared against benchmarks/baseline.json (wall times relative to the whole
+run, so the baseline's machine does not have to be this one). Golden checks assert that the
+optimized paths (chunked cleaning and aggregation, sparse design, batched scoring, Gram
+fits, model bundles) agree with their reference implementations.
+Exits non-zero on a regression or a failed golden check.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from sklearn.linear_model import Lasso  # noqa: E402
+from sklearn.preprocessing import PolynomialFeatures  # noqa: E402
+from clean import aggregate, clean_aggregated, clean_data, encode  # noqa: E402
+from model_bundle import ModelBundle, bundle_models  # noqa: E402
+from model_utils import GramEngine, Model_utils  # noqa: E402
+import synthetic  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+
+
+def measure(results, name, fn, repeats=3, **counts):
+    """
+    Records fn()'s wall time and peak allocation. tracemalloc slows traced code
+    down unevenly, so the time is the fastest of repeats untraced runs and the
+    peak comes from a separate traced run.
+    """
+    walls = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn()
+        walls.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results[name] = {'wall_s': min(walls), 'peak_mb': peak / 2**20, 'repeats': repeats, **counts}
+    print(f"  {name:<16} {min(walls):8.3f} s  (median {np.median(walls):.3f} s)  {peak / 2**20:9.1f} MB")
+    return out
+
+
+def run_scale(scale, workdir, seed=0, sparse=False, max_windows=None, predict_rows=10_000, repeats=3):
+    path = os.path.join(workdir, f'covid_{scale}.csv')
+    n_rows = synthetic.write(path, scale, seed)
+    print(f"scale {scale}: {n_rows} raw rows, best of {repeats}")
+    results = {}
+
+    cleaned = measure(results, 'clean_data', lambda: clean_data(path), rows=n_rows, repeats=repeats)
+    # the batch-host path: same aggregate, memory bounded by the chunk size
+    measure(results, 'clean_aggregated', lambda: clean_aggregated(path, chunksize=20_000), rows=n_rows, repeats=repeats)
+    encoded = measure(results, 'convert', lambda: encode(cleaned), rows=len(cleaned), repeats=repeats)
+    encoded = encoded.reset_index(drop=True)
+    windows, names = measure(
+        results, 'preprocess', lambda: Model_utils.preprocess(encoded, 2, sparse=sparse),
+        rows=len(encoded), features=len(encoded.columns) - 1, repeats=repeats
+    )
+    n_windows = len(windows) if max_windows is None else min(len(windows), max_windows)
+
+    model_dir = os.path.join(workdir, f'models_{scale}')
+    models = measure(results, 'train_and_save', lambda: [
+        Model_utils.train_and_save(windows[i][0], windows[i][2], os.path.join(model_dir, f'model_{i}.pkl'))
+        for i in range(n_windows)
+    ], windows=n_windows, poly_features=len(names), repeats=repeats)
+    measure(results, 'evaluate', lambda: [
+        Model_utils.evaluate(models[i], windows[i][1], windows[i][3]) for i in range(n_windows)
+    ], windows=n_windows, repeats=repeats)
+
+    features = encoded.drop(columns=['crude_COVID_rate'])
+    sample = features.iloc[:predict_rows]
+    poly = PolynomialFeatures(degree=2).fit(features.iloc[:1])
+    measure(results, 'predict_new', lambda: [
+        Model_utils.predict_new(sample, None, None, poly, model) for model in models
+    ], rows=len(sample), windows=n_windows, repeats=repeats)
+    return results
+
+
+def golden_checks(workdir, seed=0):
+    """Optimized paths against their reference implementations on a small input."""
+    failures = []
+
+    def check(name, fn):
+        try:
+            fn()
+            print(f"  ok    {name}")
+        except AssertionError as e:
+            failures.append(name)
+            print(f"  FAIL  {name}: {e}")
+
+    path = os.path.join(workdir, 'golden.csv')
+    synthetic.write(path, scale=6 / synthetic.BASE_MONTHS, seed=seed)
+    cleaned = clean_data(path)
+    check('chunked clean_data', lambda: pd.testing.assert_frame_equal(
+        cleaned, clean_data(path, chunksize=7_919)
+    ))
+
+    check('chunked clean_aggregated', lambda: pd.testing.assert_frame_equal(
+        aggregate(cleaned), clean_aggregated(path, chunksize=7_919)
+    ))
+
+    encoded = encode(cleaned).reset_index(drop=True)
+    dense, names = Model_utils.preprocess(encoded, 2)
+    sparse, sparse_names = Model_utils.preprocess(encoded, 2, sparse=True)
+
+    def sparse_design():
+        assert list(names) == list(sparse_names), 'feature names differ'
+        np.testing.assert_allclose(sparse.X.toarray(), dense.X)
+    check('sparse design matrix', sparse_design)
+
+    models = [Lasso(alpha=0.1, max_iter=10_000).fit(w[0], w[2]) for w in dense]
+    features = encoded.drop(columns=['crude_COVID_rate'])
+    poly = PolynomialFeatures(degree=2).fit(features.iloc[:1])
+    reference = np.column_stack([Model_utils.predict_new(features, None, None, poly, m) for m in models])
+    check('predict_all', lambda: np.testing.assert_allclose(
+        Model_utils.predict_all(features, None, None, poly, models), reference, rtol=1e-10, atol=1e-10
+    ))
+
+    def bundle():
+        bundle_path = os.path.join(workdir, 'golden_bundle.bin')
+        bundle_models(bundle_path, models, names)
+        np.testing.assert_allclose(
+            Model_utils.predict_all(features, None, None, poly, ModelBundle(bundle_path)), reference,
+            rtol=1e-10, atol=1e-10
+        )
+    check('model bundle', bundle)
+
+    def gram():
+        rows, _ = Model_utils.preprocess(encoded, 2, split='row')
+        engine = GramEngine(rows)
+        X_tr, X_te, y_tr, _ = rows[0]
+        direct = Lasso(alpha=0.1, max_iter=100_000, tol=1e-10).fit(X_tr, y_tr)
+        fitted = engine.fit(0, alpha=0.1, max_iter=100_000, tol=1e-10)
+        np.testing.assert_allclose(fitted.predict(X_te), direct.predict(X_te), rtol=1e-5, atol=1e-6)
+    check('gram engine', gram)
+    return failures
+
+
+def compare(results, baseline, tolerance, noise_floor=0.1):
+    """
+    Stages slower (or bigger) than baseline by more than tolerance.
+    baseline.json holds another machine's seconds, so wall times are compared
+    relative to the run: this run's times are rescaled so the stages the two
+    share take the same total, and only a stage whose share of it grew is
+    flagged. (A slowdown of every stage alike does not show up here; the
+    printed totals do.) Both sides' times are the fastest of their repeats, so
+    one noisy run does not flag a stage. Peak memory does not depend on the
+    machine and is compared as is.
+    """
+    regressions = []
+    for key, stages in results.items():
+        shared = [stage for stage in stages if stage in baseline.get(key, {})]
+        if not shared:
+            continue
+        speed = sum(baseline[key][s]['wall_s'] for s in shared) / sum(stages[s]['wall_s'] for s in shared)
+        for stage in shared:
+            before = baseline[key][stage]
+            now = dict(stages[stage], wall_s=stages[stage]['wall_s'] * speed)
+            for metric, floor in (('wall_s', noise_floor), ('peak_mb', 1.0)):
+                if now[metric] > before[metric] * (1 + tolerance) and now[metric] - before[metric] > floor:
+                    regressions.append(f"{key} {stage} {metric}: {before[metric]:.3f} -> {now[metric]:.3f}"
+                                       + (' (at baseline speed)' if metric == 'wall_s' else ''))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scales', type=float, nargs='+', default=[0.1])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sparse', action='store_true', help='use the sparse design-matrix path')
+    parser.add_argument('--max-windows', type=int, default=None, help='train/evaluate at most this many windows')
+    parser.add_argument('--repeats', type=int, default=3, help='untraced timing runs per stage (the fastest counts)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before flagging')
+    parser.add_argument('--noise-floor', type=float, default=0.1,
+                        help='seconds a stage may slow down by regardless of tolerance')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--skip-golden', action='store_true')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {
+            f"scale={scale},sparse={args.sparse}": run_scale(
+                scale, workdir, args.seed, args.sparse, args.max_windows, repeats=args.repeats
+            )
+            for scale in args.scales
+        }
+        failures = []
+        if not args.skip_golden:
+            print('golden checks')
+            failures = golden_checks(workdir, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.noise_floor)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=1)
+        print(f"baseline written to {args.baseline}")
+
+    sys.exit(1 if regressions or failures else 0)
@@ -0,0 +1,92 @@
+# benchmarks/synthetic.py
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# regions lives in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from regions import REGION_LABELS  # noqa: E402
+
+# The subgroup1 values of the real file's Race and Age rows
+RACES = [
+    'Hispanic',
+    'Non-Hispanic American Indian or Alaska Native',
+    'Non-Hispanic Asian',
+    'Non-Hispanic Asian, Native Hawaiian or Other Pacific Islander',
+    'Non-Hispanic Black',
+    'Non-Hispanic Native Hawaiian or Other Pacific Islander',
+    'Non-Hispanic White',
+]
+AGES = [
+    '0-4 years', '5-11 years', '12-17 years', '18-29 years', '30-39 years',
+    '40-49 years', '50-64 years', '65-74 years', '75 years and over',
+]
+# The real file reports the nation and the ten HHS regions, not states
+JURISDICTIONS = ['United States'] + REGION_LABELS
+
+# Months in the real provisional-deaths file (Jan 2020 - Apr 2025)
+BASE_MONTHS = 64
+
+
+def iter_chunks(scale=1.0, seed=0, jurisdictions=None, months_per_chunk=12):
+    """
+    Synthetic provisional-deaths file with the CDC schema, months_per_chunk
+    months per frame. scale=1 matches the real volume; larger scales extend
+    the monthly history (more months, more windows) while keeping the
+    jurisdiction and demographic vocabulary, so the feature count stays fixed
+    like it does in production.
+    """
+    rng = np.random.default_rng(seed)
+    jurisdictions = np.asarray(JURISDICTIONS if jurisdictions is None else jurisdictions, dtype=object)
+    n_months = max(int(round(BASE_MONTHS * scale)), 2)
+
+    # Every group the real file carries, so filters in encode have work to do
+    groups = (
+        [('Race and Age', race, age) for race in RACES for age in AGES]
+        + [('Sex', sex, '') for sex in ('Female', 'Male')]
+        + [('Age', age, '') for age in AGES]
+        + [('Race', race, '') for race in RACES]
+        + [('Total', 'Total', '')]
+    )
+    group = np.array([g[0] for g in groups], dtype=object)
+    subgroup1 = np.array([g[1] for g in groups], dtype=object)
+    subgroup2 = np.array([g[2] for g in groups], dtype=object)
+
+    for first in range(0, n_months, months_per_chunk):
+        month_index = np.arange(first, min(first + months_per_chunk, n_months))
+        n = len(month_index) * len(jurisdictions) * len(groups)
+        m = np.repeat(month_index, len(jurisdictions) * len(groups))
+        j = np.tile(np.repeat(np.arange(len(jurisdictions)), len(groups)), len(month_index))
+        g = np.tile(np.arange(len(groups)), len(month_index) * len(jurisdictions))
+
+        deaths = rng.poisson(20, n).astype(float)
+        deaths[rng.random(n) < 0.3] = np.nan  # suppressed counts
+        rate = rng.gamma(2.0, 5.0, n)
+        rate[rng.random(n) < 0.1] = np.nan
+
+        yield pd.DataFrame({
+            'jurisdiction_residence': jurisdictions[j],
+            'year': 2020 + m // 12,
+            'month': m % 12 + 1,
+            'group': group[g],
+            'subgroup1': subgroup1[g],
+            'subgroup2': subgroup2[g],
+            'COVID_deaths': deaths,
+            'crude_COVID_rate': rate,
+            'footnote': np.where(rng.random(n) < 0.95, None, 'Counts suppressed'),
+        })
+
+
+def generate(scale=1.0, seed=0, jurisdictions=None):
+    """The whole synthetic file as one frame (see iter_chunks); for small scales."""
+    return pd.concat(list(iter_chunks(scale, seed, jurisdictions)), ignore_index=True)
+
+
+def write(path, scale=1.0, seed=0):
+    """Writes the synthetic file to path a year of months at a time, so memory does not grow with scale; returns the row count."""
+    n_rows = 0
+    for chunk in iter_chunks(scale, seed):
+        chunk.to_csv(path, mode='w' if n_rows == 0 else 'a', header=n_rows == 0, index=False)
+        n_rows += len(chunk)
+    return n_rows
@@ -1,6 +1,28 @@
+import json
+import os
+import sys
+import numpy as np
 import pandas as pd
+from artifact_cache import artifact_key, cached_frame, save_frame
+from instrument import run, stage
+from regions import political_control_shares, region_of
+
+def clean_data(file_path, n_rows_preview=5, chunksize=None, fill_values=None):
+    """
+    The de-duplicated file with sparse columns dropped and gaps filled.
+    fill_values (column -> value) replaces the column mean as the fill of
+    those columns; the fills used end up in the result's attrs['fill_values'].
+
+    With chunksize the raw file is parsed chunksize rows at a time, but the
+    cleaned result is still the whole file in memory. For bounded memory use
+    iter_clean_chunks (cleaned chunks, one at a time) or clean_aggregated
+    (what the pipeline and clean.main(chunksize) run).
+    """
+    # Same output as below, built from iter_clean_chunks
+    if chunksize is not None:
+        chunks = list(iter_clean_chunks(file_path, chunksize, fill_values))
+        return pd.concat(chunks) if chunks else pd.DataFrame()
 
-def clean_data(file_path, n_rows_preview=5):
     # Load data
     df = pd.read_csv(file_path)
 
@@ -14,80 +36,367 @@ def clean_data(file_path, n_rows_preview=5):
 
     # Fill remaining missing numeric values with column mean
     numeric_cols = df.select_dtypes(include=["float64", "int64"]).columns
-    df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].mean())
+    means = _pinned(df[numeric_cols].mean(), fill_values)
+    df[numeric_cols] = df[numeric_cols].fillna(means)
+    df.attrs['fill_values'] = {col: float(v) for col, v in means.items()}
 
-    # Fill remaining missing object (string) values with empty string
-    object_cols = df.select_dtypes(include=["object"]).columns
+    # Fill remaining missing object (string) values with empty string; pandas 3 reads text as "str",
+    # which select_dtypes only counts as object under a deprecation
+    object_cols = df.select_dtypes(include=["object", "string"]).columns
     df[object_cols] = df[object_cols].fillna("")
 
     # Step 3: Convert data types (optional)
     # Example: convert object columns that look like numbers to numeric
     for col in object_cols:
-        try:
-            df[col] = pd.to_numeric(df[col])
-        except ValueError:
-            pass  # Skip columns that can't be converted
+        parsed = _parse_numeric(df[col])
+        if parsed is not None:
+            df[col] = parsed
 
     return df
 
-def convert(df):
-    std_df = pd.DataFrame()
-    time_col = pd.to_datetime(
-    df['year'].astype(str) + '-' + df['month'].astype(str).str.zfill(2) + '-01'
-    )
-
-    min_time = time_col.min()
-    # Save months since min_time
-    std_df['time'] = (time_col.dt.year - min_time.year) * 12 + (time_col.dt.month - min_time.month)
-
-    age_map = {
-        '0-4 years': 2,
-        '5-11 years': 8,
-        '12-17 years': 14.5,
-        '18-29 years': 23.5,
-        '30-39 years': 34.5,
-        '40-49 years': 44.5,
-        '50-64 years': 57,
-        '65-74 years': 69.5,
-        '75 years and over': 80  # Assumed average; you can adjust as needed
-    }
-
-    std_df['age'] = df['subgroup2'].map(age_map)
-
-    encoded = pd.get_dummies(df[['subgroup1', 'jurisdiction_residence']], drop_first=True)
-    std_df = pd.concat([std_df, encoded], axis=1)
-    normalized_rates = (df['crude_COVID_rate'] - df['crude_COVID_rate'].mean()) / df['crude_COVID_rate'].std()
-    std_df['crude_COVID_rate'] = normalized_rates
-    std_df = std_df.sort_values(by='time')
-    return std_df
+def _pinned(means, fill_values):
+    """means with the columns named in fill_values replaced by the pinned value."""
+    if not fill_values:
+        return means
+    pinned = pd.Series(fill_values, dtype="float64").reindex(means.index)
+    return pinned.fillna(means)
+
+def _parse_numeric(values, sample=64):
+    """values as numbers, or None if any entry is not numeric (blanks parse as NaN).
+
+    A small sample is tried first, so text columns are rejected after parsing a
+    few values instead of failing part way through the whole column.
+    """
+    try:
+        pd.to_numeric(values.iloc[:sample])
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        return None
+
+def _merge_dtype(a, b):
+    """Dtype pandas would infer for a column seen as `a` in one chunk and `b` in another."""
+    if a is None or a == b:
+        return b
+    numeric = ("int64", "float64")
+    if str(a) in numeric and str(b) in numeric:
+        return np.dtype("float64")
+    # True/False next to anything else (numbers, text, blanks) reads as object
+    if "bool" in (str(a), str(b)):
+        return np.dtype(object)
+    # Anything non-numeric wins (an all-NaN chunk of a text column parses as float64)
+    return b if str(a) in numeric else a
+
+def _holds_only_booleans(column):
+    """True if every non-blank value in a parsed chunk column is True/False."""
+    if column.dtype == bool:
+        return True
+    values = column.dropna()
+    # read_csv never mixes bools with other values, so the first one decides
+    return values.empty or (column.dtype == object and isinstance(values.iloc[0], bool))
+
+def _merge_parsed_dtype(a, b):
+    """Dtype pd.to_numeric gives a column parsed as `a` in one chunk and `b` in another.
+
+    Unlike read_csv it counts True/False as numbers, so bools widen to int or float.
+    """
+    if a is None or a == b:
+        return b
+    return np.result_type(a, b)
+
+def _resolve_dtypes(file_path, chunksize):
+    """Pass 0: find the dtype every column would get from a single read_csv.
+
+    Also returns the object columns that only ever hold True/False and blanks:
+    a single read_csv keeps those as Python bools, which forcing object dtype on
+    the chunked read would turn into the strings 'True'/'False'.
+    """
+    dtypes, booleans = {}, {}
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        for col, dtype in chunk.dtypes.items():
+            dtypes[col] = _merge_dtype(dtypes.get(col), dtype)
+            booleans[col] = booleans.get(col, True) and _holds_only_booleans(chunk[col])
+    boolean_cols = [col for col, only in booleans.items() if only and dtypes[col] == object]
+    return dtypes, boolean_cols
+
+def _unique_chunks(file_path, chunksize, dtypes, boolean_cols=()):
+    """Yield chunks with duplicate rows removed, keeping the first occurrence file-wide.
+
+    Rows are identified by a 64-bit hash, so only the hash set grows with the
+    number of distinct rows; the rows themselves never outlive their chunk.
+    """
+    forced = {col: dtype for col, dtype in dtypes.items() if col not in boolean_cols}
+    seen = set()
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=forced):
+        for col in boolean_cols:
+            chunk[col] = chunk[col].astype(object)
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        keep &= np.fromiter((h not in seen for h in hashes), dtype=bool, count=len(hashes))
+        seen.update(hashes[keep].tolist())
+        yield chunk[keep]
+
+def iter_clean_chunks(file_path, chunksize=100_000, fill_values=None):
+    """Chunked equivalent of clean_data: yields cleaned chunks in file order.
 
+    Reads the file three times (dtype resolution, statistics, output) so that
+    peak memory is bounded by `chunksize` rather than by the file size.
+    """
+    dtypes, boolean_cols = _resolve_dtypes(file_path, chunksize)
+    template = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+    numeric_all = template.select_dtypes(include=["float64", "int64"]).columns
+    object_all = template.select_dtypes(include=["object", "string"]).columns
 
-df = clean_data("covid_data.csv")
-df = df[df["jurisdiction_residence"] != "United States"]
-df = df[df["group"] == "Race and Age"]
-df = df.groupby(['month', 'year', 'jurisdiction_residence', 'subgroup1', 'subgroup2'])['crude_COVID_rate'].sum().reset_index()
-df = convert(df)
+    # Pass 1: running accumulators over the de-duplicated rows
+    n_rows = 0
+    non_null = pd.Series(0, index=template.columns)
+    sums = pd.Series(0.0, index=numeric_all)
+    converted = {col: None for col in object_all}  # None = no chunk seen yet, False = not convertible
+    for chunk in _unique_chunks(file_path, chunksize, dtypes, boolean_cols):
+        n_rows += len(chunk)
+        non_null += chunk.notna().sum()
+        sums += chunk[numeric_all].sum()
+        for col, dtype in converted.items():
+            if dtype is False:
+                continue
+            parsed = _parse_numeric(chunk[col].fillna(""))
+            converted[col] = False if parsed is None else _merge_parsed_dtype(dtype, parsed.dtype)
 
+    # Step 2 decisions, made from the accumulators instead of the full frame
+    threshold = n_rows * 0.5
+    kept = non_null.index[non_null >= threshold]
+    numeric_cols = numeric_all.intersection(kept, sort=False)
+    object_cols = object_all.intersection(kept, sort=False)
+    means = _pinned((sums[numeric_cols] / non_null[numeric_cols]).astype("float64"), fill_values)
 
-df.to_csv("df_encoded.csv", index=False)
+    # Pass 2: apply the same steps as clean_data chunk by chunk
+    for chunk in _unique_chunks(file_path, chunksize, dtypes, boolean_cols):
+        chunk = chunk[kept].copy()
+        chunk[numeric_cols] = chunk[numeric_cols].fillna(means)
+        chunk.attrs['fill_values'] = {col: float(v) for col, v in means.items()}
+        chunk[object_cols] = chunk[object_cols].fillna("")
+        for col in object_cols:
+            if converted[col]:
+                chunk[col] = pd.to_numeric(chunk[col]).astype(converted[col])
+        yield chunk
 
-# Define HHS regions globally
-hhs_regions = {
-        '1': ['Connecticut', 'Maine', 'Massachusetts', 'New Hampshire', 'Rhode Island', 'Vermont'],
-        '2': ['New Jersey', 'New York'],
-        '3': ['Delaware', 'District of Columbia', 'Maryland', 'Pennsylvania', 'Virginia', 'West Virginia'],
-        '4': ['Alabama', 'Florida', 'Georgia', 'Kentucky', 'Mississippi', 'North Carolina', 'South Carolina', 'Tennessee'],
-        '5': ['Illinois', 'Indiana', 'Michigan', 'Minnesota', 'Ohio', 'Wisconsin'],
-        '6': ['Arkansas', 'Louisiana', 'New Mexico', 'Oklahoma', 'Texas'],
-        '7': ['Iowa', 'Kansas', 'Missouri', 'Nebraska'],
-        '8': ['Colorado', 'Montana', 'North Dakota', 'South Dakota', 'Utah', 'Wyoming'],
-        '9': ['Arizona', 'California', 'Hawaii', 'Nevada'],
-        '10': ['Alaska', 'Idaho', 'Oregon', 'Washington']
+AGE_MIDPOINTS = {
+    '0-4 years': 2,
+    '5-11 years': 8,
+    '12-17 years': 14.5,
+    '18-29 years': 23.5,
+    '30-39 years': 34.5,
+    '40-49 years': 44.5,
+    '50-64 years': 57,
+    '65-74 years': 69.5,
+    '75 years and over': 80  # Assumed average; you can adjust as needed
 }
 
-political_data = pd.read_csv('state_political_control.csv')
+# One-hot encoded columns; drop-first over their sorted categories, like get_dummies
+DUMMY_COLUMNS = ('subgroup1', 'jurisdiction_residence')
+
+def vocabulary_of(df, columns=DUMMY_COLUMNS):
+    """Sorted categories of each dummy column as they occur in df; the first is the dropped baseline."""
+    return {col: sorted(df[col].dropna().unique().tolist()) for col in columns}
+
+def _codes(values, categories, name=None):
+    """Position of every value in categories; raises on values outside it when name is given."""
+    # Factorize once, then look up only the distinct values in the vocabulary
+    local, uniques = pd.factorize(values)
+    lookup = pd.Index(categories).get_indexer(uniques)
+    if name is not None and (lookup < 0).any():
+        unknown = sorted(uniques[lookup < 0].tolist())
+        raise ValueError(f"{name} has values outside the encoding vocabulary: {unknown}")
+    # local is -1 for missing values; give them code -1 as well
+    return np.append(lookup, -1).astype(np.int16)[local]
+
+def _dummies(codes):
+    """(rows, columns) of the uint8 drop-first dummies for the given category codes."""
+    rows = np.flatnonzero(codes > 0)
+    return rows, codes[rows] - 1
+
+def convert(df, vocabulary=None, rate_scaling=None):
+    """
+    Model features sorted by time: months since the first month (int32),
+    age-group midpoints (float32), uint8 dummies and the standardized rate
+    (float32). vocabulary pins the dummy categories (default: the ones in df),
+    rate_scaling the (mean, std) the rate is standardized with (default: df's).
+    """
+    if vocabulary is None:
+        vocabulary = vocabulary_of(df)
+    # Months since the earliest month, straight from the integer year/month
+    months = df['year'].to_numpy(np.int32) * 12 + df['month'].to_numpy(np.int32)
+    # Everything is gathered in time order up front, so the frame is never sorted or copied
+    order = np.argsort(months, kind='stable')
+    n = len(order)
+
+    # One uint8 block for every dummy column, filled from category codes
+    columns, blocks, offset = [], [], 0
+    for col, categories in vocabulary.items():
+        rows, cols = _dummies(_codes(df[col], categories, col)[order])
+        columns += [f"{col}_{c}" for c in categories[1:]]
+        blocks.append((rows, cols + offset))
+        offset += len(categories) - 1
+    rows = np.concatenate([b[0] for b in blocks]) if blocks else np.empty(0, dtype=np.intp)
+    cols = np.concatenate([b[1] for b in blocks]) if blocks else np.empty(0, dtype=np.intp)
+    matrix = np.zeros((n, offset), dtype=np.uint8)
+    matrix[rows, cols] = 1
+    std_df = pd.DataFrame(matrix, columns=columns, copy=False)
+
+    std_df.insert(0, 'time', (months[order] - months.min()).astype(np.int32))
+    age_codes = _codes(df['subgroup2'], list(AGE_MIDPOINTS))[order]
+    midpoints = np.append(np.array(list(AGE_MIDPOINTS.values()), dtype=np.float32), np.float32(np.nan))
+    std_df.insert(1, 'age', midpoints[age_codes])  # code -1 (unknown age group) picks the NaN
+
+    rate = df['crude_COVID_rate'].to_numpy(np.float64)
+    mean, std = rate_scaling_of(df) if rate_scaling is None else rate_scaling
+    normalized_rates = (rate - mean) / std
+    std_df['crude_COVID_rate'] = normalized_rates[order].astype(np.float32)
+    std_df.index = df.index[order]
+    return std_df
+
+
+def rate_scaling_of(df):
+    """(mean, std) of the rate that convert standardizes with by default."""
+    rate = df['crude_COVID_rate'].to_numpy(np.float64)
+    return float(np.nanmean(rate)), float(np.nanstd(rate, ddof=1))
+
+
+# Whole-file statistics the encoding depends on: the fills clean_data used, the
+# rate's scaling and the dummy vocabulary. Pinned at the first encode and reused
+# after, so appending months leaves the earlier months' rows, the feature set
+# (and so the window models) unchanged; a category the pinned vocabulary lacks is
+# an error from convert. Delete the file to re-derive them from the current data.
+ENCODING_PARAMS_PATH = os.path.join('models', 'encoding_params.json')
+
+def load_encoding_params(path=ENCODING_PARAMS_PATH):
+    """
+    {'fill_values': {...}, 'rate_scaling': [mean, std], 'vocabulary': {column: [...]}},
+    or None before the first encode. Files pinned before the vocabulary was have no 'vocabulary'.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def pin_encoding_params(aggregated, path=ENCODING_PARAMS_PATH):
+    """Derives the encoding params from an aggregated frame (fills from its attrs) and saves them to path."""
+    params = {'fill_values': aggregated.attrs.get('fill_values', {}),
+              'rate_scaling': list(rate_scaling_of(aggregated)),
+              'vocabulary': vocabulary_of(aggregated)}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(params, f, indent=1)
+    return params
+
+
+GROUP_KEYS = ['month', 'year', 'jurisdiction_residence', 'subgroup1', 'subgroup2']
+
+def _sum_groups(df):
+    return df.groupby(GROUP_KEYS)['crude_COVID_rate'].sum().reset_index()
+
+def _aggregate(df):
+    df = df[df["jurisdiction_residence"] != "United States"]
+    df = df[df["group"] == "Race and Age"]
+    return _sum_groups(df)
+
+def aggregate(df):
+    """Race-and-age rows of every jurisdiction, summed per month."""
+    with stage('aggregate', rows=len(df)) as record:
+        df = _aggregate(df)
+        record['rows_out'] = len(df)
+    return df
+
+
+def clean_aggregated(file_path, chunksize=100_000, fill_values=None):
+    """
+    aggregate(clean_data(file_path)) one chunk at a time: every cleaned chunk
+    is filtered and summed into a running total before the next is read, so
+    memory is bounded by chunksize and the aggregated frame, not the raw file.
+    """
+    total, attrs = None, {}
+    with stage('clean_aggregated', chunksize=chunksize) as record:
+        for chunk in iter_clean_chunks(file_path, chunksize, fill_values):
+            attrs = chunk.attrs
+            part = _aggregate(chunk)
+            total = part if total is None else _sum_groups(pd.concat([total, part], ignore_index=True))
+        if total is None:
+            total = pd.DataFrame(columns=GROUP_KEYS + ['crude_COVID_rate'])
+        total.attrs = dict(attrs)
+        record['rows_out'] = len(total)
+    return total
+
+
+def encode(df):
+    df = aggregate(df)
+    with stage('convert', rows=len(df)) as record:
+        df = convert(df)
+        record['features'] = df.shape[1] - 1
+    return df
+
+
+def encoded_dtypes(columns):
+    """dtype of every column of an encoded frame, as convert builds it; dummies are uint8."""
+    fixed = {'time': np.int32, 'age': np.float32, 'crude_COVID_rate': np.float32}
+    return {col: fixed.get(col, np.uint8) for col in columns}
+
+
+def write_encoded(df, path="df_encoded.csv"):
+    """Writes the encoded frame and seeds Model_utils.load_data's cache with it."""
+    df.to_csv(path, index=False)
+    # load_data casts a parsed CSV to this schema too, so both routes give identical frames
+    save_frame(df.reset_index(drop=True).astype(encoded_dtypes(df.columns)),
+               'df_encoded', artifact_key('df_encoded', [path]))
+    return df
+
+
+# Bump when clean_data/encode change so stale cache entries are not reused
+CACHE_PARAMS = {'version': 4, 'exclude': 'United States', 'group': 'Race and Age'}
+
+def load_cleaned(fill_values=None):
+    with stage('clean') as record:
+        cleaned, _ = cached_frame('cleaned', lambda: clean_data("covid_data.csv", fill_values=fill_values),
+                                  sources=["covid_data.csv"], params={**CACHE_PARAMS, 'fill_values': fill_values})
+        record['rows'] = len(cleaned)
+    return cleaned
+
+
+def main(chunksize=None):
+    pinned = load_encoding_params()
+
+    def build():
+        fill_values = pinned and pinned['fill_values']
+        if chunksize is None:
+            aggregated = aggregate(load_cleaned(fill_values))
+        else:
+            # Batch hosts: clean and aggregate chunk by chunk, never holding the raw file
+            aggregated = clean_aggregated("covid_data.csv", chunksize, fill_values)
+        params = pinned or pin_encoding_params(aggregated)
+        with stage('convert', rows=len(aggregated)):
+            return convert(aggregated, vocabulary=params.get('vocabulary'), rate_scaling=params['rate_scaling'])
+
+    if pinned is None:
+        # First encode: derive the params from this file (and pin them) rather than reuse a cached frame
+        df = build()
+    else:
+        # The encoded frame is keyed on the raw file too, so a warm start skips the cleaned frame entirely
+        df, _ = cached_frame('encoded', build, sources=["covid_data.csv"], params={**CACHE_PARAMS, **pinned})
+
+    # Seeding the loader's cache means Model_utils.load_data never has to parse the CSV
+    write_encoded(df)
 
 def concat(covid_data, political_data):
-    concat_data = pd.DataFrame()
-    concat_data['region'] = political_data['State'].map(hhs_regions)
-    
\ No newline at end of file
+    """covid_data with each row's HHS region and that region's political control shares for the row's year"""
+    concat_data = covid_data.copy()
+    # States and "Region N" rows both get a region; national rows get 0 and no shares
+    concat_data['region'] = region_of(covid_data['jurisdiction_residence'])
+    shares = political_control_shares(political_data).rename(columns={'Year': 'year', 'Region': 'region'})
+    merged = concat_data.merge(shares, on=['year', 'region'], how='left')
+    merged.index = covid_data.index
+    return merged
+
+
+if __name__ == '__main__':
+    # python clean.py [clean_report.json]: per-stage timings and memory only when a report path is given
+    with run(sys.argv[1] if len(sys.argv) > 1 else None):
+        main()
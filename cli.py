@@ -0,0 +1,181 @@
+# cli.py
+"""
+Command-line entry point for the COVID window models.
+
+    python cli.py clean                 # covid_data.csv -> df_encoded.csv
+    python cli.py train --n-jobs 4      # fit every window, write the model bundle
+    python cli.py train --mode path     # ... or warm_start / gram / incremental / path
+    python cli.py evaluate              # per-window MSE / R^2, with the trained mode's models
+    python cli.py report -o report.pdf  # coefficient trajectories
+    python cli.py report --alpha 0.01   # ... at a point on a path-mode model's regularization path
+    python cli.py predict rows.csv      # (rows x windows) predictions as CSV
+    python cli.py sweep --n-jobs 4      # forward-chaining hyperparameter sweep into sweep.db
+
+clean/train/evaluate/report go through the memoizing pipeline in main.py, so
+they only redo work whose inputs changed. predict reads the model bundle with
+NumPy alone; pandas, sklearn and matplotlib are never imported for it.
+"""
+import argparse
+import sys
+
+
+def _pipeline(args):
+    from main import build_pipeline
+    return build_pipeline(args.source, n_jobs=getattr(args, 'n_jobs', 1),
+                          report_output=getattr(args, 'output', None) or 'coefficient_report.pdf',
+                          chunksize=args.chunksize, mode=getattr(args, 'mode', None), sparse=args.sparse,
+                          report_alpha=getattr(args, 'alpha', None))
+
+
+def _run(args, target):
+    # import (and build) the pipeline first: with --run-report the whole block is traced
+    pipeline = _pipeline(args)
+    force = [target] if args.force else []
+    if args.run_report is None:
+        return pipeline.run(targets=[target], force=force)[target]
+    from instrument import run
+    with run(args.run_report):
+        return pipeline.run(targets=[target], force=force)[target]
+
+
+def cmd_clean(args):
+    encoded = _run(args, 'encode')
+    print(f"df_encoded.csv: {len(encoded)} rows, {encoded.shape[1] - 1} features")
+
+
+def cmd_train(args):
+    models, _ = _run(args, 'train')
+    print(f"{len(models)} window models in models/model_bundle.bin")
+
+
+def cmd_evaluate(args):
+    print(_run(args, 'evaluate').to_string())
+
+
+def cmd_report(args):
+    from model import trained_mode
+    if args.alpha is not None and trained_mode() != 'path':
+        sys.exit("--alpha needs a regularization path; train with `cli.py train --mode path` first")
+    features = _run(args, 'report')
+    print(f"{len(features)} coefficient trajectories")
+
+
+def _number(value):
+    # df_encoded.csv writes its dummies as 0/1; rows copied from older encodings may still say True/False
+    if isinstance(value, str) and value in ('True', 'False'):
+        return float(value == 'True')
+    return float(value)
+
+
+def cmd_predict(args):
+    import csv
+    import json
+    import numpy as np
+    from model_bundle import ModelBundle, poly2_expand, poly2_names
+
+    bundle = ModelBundle(args.bundle)
+    input_features = bundle.metadata.get('input_features')
+    if input_features is None:
+        sys.exit(f"{args.bundle} does not record its input features; retrain with `cli.py train`")
+    if poly2_names(input_features) != list(bundle.feature_names):
+        sys.exit(f"{args.bundle} was not trained on a degree-2 expansion of its input features")
+    if args.alpha is not None and bundle.alphas is None:
+        sys.exit(f"{args.bundle} holds no regularization path; --alpha needs a model trained with --mode path")
+
+    def read_rows(f):
+        if args.input.endswith('.json'):
+            payload = json.load(f)
+            return payload['rows'] if isinstance(payload, dict) else payload
+        return list(csv.DictReader(f))
+
+    # stdin is not ours to close
+    if args.input == '-':
+        rows = read_rows(sys.stdin)
+    else:
+        with open(args.input, newline='') as f:
+            rows = read_rows(f)
+    try:
+        X = np.array([[_number(row[name]) for name in input_features] for row in rows], dtype=np.float64)
+    except KeyError as e:
+        sys.exit(f"missing feature {e.args[0]!r}")
+    # model_bundle files carry no scalers; the root models are trained on unscaled features
+    preds = bundle.predict(poly2_expand(X.reshape(len(rows), len(input_features))), alpha=args.alpha)
+
+    def write_predictions(out):
+        writer = csv.writer(out)
+        writer.writerow([f'window_{i}' for i in range(len(bundle))])
+        writer.writerows(preds.tolist())
+
+    if args.output is None:
+        write_predictions(sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as out:
+            write_predictions(out)
+
+
+def cmd_sweep(args):
+    import sweep
+    sweep.main(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def pipeline_command(name, fn, help):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('--source', default='covid_data.csv', help='raw CDC export')
+        sub.add_argument('--chunksize', type=int, default=None,
+                         help='clean and aggregate the source this many rows at a time (bounded memory)')
+        sub.add_argument('--sparse', action='store_true', help='build the design matrix as CSR (Model(sparse=True))')
+        sub.add_argument('--force', action='store_true', help=f'redo the {name} step even if it is cached')
+        sub.add_argument('--run-report', default=None, help='write per-stage timings to this JSON file')
+        sub.set_defaults(fn=fn)
+        return sub
+
+    pipeline_command('clean', cmd_clean, 'clean and encode the raw data')
+    train = pipeline_command('train', cmd_train, 'fit the window models')
+    train.add_argument('--n-jobs', type=int, default=1)
+    # model_utils.TRAINING_MODES, spelled out so predict never has to import sklearn.
+    # Only train takes it: evaluate and report reuse the mode the bundle was trained with
+    train.add_argument('--mode', default='cold', choices=('cold', 'warm_start', 'gram', 'incremental', 'path'),
+                       help='how the window models are fitted (see Model_utils.train_mode)')
+    pipeline_command('evaluate', cmd_evaluate, 'score every window on its test rows')
+    report = pipeline_command('report', cmd_report, 'render coefficient trajectories')
+    report.add_argument('-o', '--output', default='coefficient_report.pdf', help='.pdf file or PNG directory')
+    report.add_argument('--alpha', type=float, default=None,
+                        help='render the coefficients at the nearest alpha on the stored path (--mode path models)')
+
+    sweep = commands.add_parser('sweep', help='validate (degree, window size, stride, alpha) combinations')
+    # the sweep module is only imported when the command runs, so its arguments live here
+    sweep.add_argument('--data', default='df_encoded.csv', help='encoded frame (see clean.py)')
+    sweep.add_argument('--degrees', type=int, nargs='+', default=[1, 2])
+    sweep.add_argument('--window-sizes', type=int, nargs='+', default=[2, 3, 6])
+    sweep.add_argument('--strides', type=int, nargs='+', default=[1])
+    sweep.add_argument('--alphas', type=float, nargs='+', default=[0.001, 0.01, 0.1, 1.0])
+    sweep.add_argument('--horizon', type=int, default=1, help='months scored after each training window')
+    sweep.add_argument('--n-jobs', type=int, default=1)
+    sweep.add_argument('--min-folds', type=int, default=3, help='rounds before pruning starts')
+    sweep.add_argument('--prune-ratio', type=float, default=1.5, help='drop candidates this much worse than the best')
+    sweep.add_argument('--no-prune', action='store_true')
+    sweep.add_argument('--dense', action='store_true', help='use the dense design matrix')
+    sweep.add_argument('--db', default='sweep.db')
+    sweep.set_defaults(fn=cmd_sweep)
+
+    predict = commands.add_parser('predict', help='score feature rows with every window model')
+    predict.add_argument('input', help="CSV with one column per input feature, a .json rows list, or - for stdin")
+    predict.add_argument('--bundle', default='models/model_bundle.bin')
+    predict.add_argument('-o', '--output', default=None, help='CSV output path (default: stdout)')
+    predict.add_argument('--alpha', type=float, default=None,
+                         help='score at the nearest alpha on the stored path (bundles trained with --mode path)')
+    predict.set_defaults(fn=cmd_predict)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.fn(args)
+
+
+if __name__ == '__main__':
+    main()
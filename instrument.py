@@ -0,0 +1,169 @@
+# instrument.py
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_active = None
+
+
+class RunReport:
+    """
+    Wall time, CPU time, peak traced allocation and row/feature counts for
+    every stage of one pipeline run, written out as a JSON report. With
+    profile_dir set, each top-level stage also gets a cProfile dump.
+    Stages may run on several threads; nesting is tracked per thread. A stage
+    whose block raises is still recorded, with the exception under 'error'.
+    tracemalloc keeps one process-wide peak, so a stage's peak_mb is the
+    highest traced memory, on any thread, while it ran, above what was
+    traced when it started: exact for a stage that runs alone, an upper bound
+    (never an under-count) for stages that overlap. With trace_memory off,
+    stages get wall and CPU time only and tracemalloc is never started.
+    """
+    def __init__(self, profile_dir: str = None, trace_memory: bool = True):
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.started = time.time()
+        self.stages = []
+        self._local = threading.local()
+        # every open stage on every thread; resetting the peak must not lose theirs
+        self._open = []
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str, **counts):
+        """Measures the with-block; counts (rows=..., features=...) can be added to the yielded dict."""
+        record = {
+            'stage': name,
+            'parent': self._stack[-1]['stage'] if self._stack else None,
+            'start_s': time.time() - self.started,
+            **counts
+        }
+        own_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if own_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            with self._lock:
+                self._reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+                record['_peak'] = base
+                self._open.append(record)
+
+        profiler = None
+        # cProfile allows one active profiler per thread
+        if self.profile_dir and not self._stack:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        self._stack.append(record)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = time.process_time() - cpu
+            self._stack.pop()
+
+            if self.trace_memory:
+                with self._lock:
+                    self._reset_peak()
+                    self._open.remove(record)
+                    record['peak_mb'] = max(record.pop('_peak') - base, 0) / 2**20
+            if own_tracing:
+                tracemalloc.stop()
+
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f'{len(self.stages):02d}_{name}.prof')
+                profiler.dump_stats(path)
+                record['profile'] = path
+            self.stages.append(record)
+
+    def add(self, name: str, wall_s: float, cpu_s: float, started: float = None, **counts):
+        """
+        Records a stage timed somewhere this report cannot see, such as a worker
+        process, under the thread's current stage. started is its time.time()
+        at the start; no memory is recorded for it.
+        """
+        self.stages.append({
+            'stage': name,
+            'parent': self._stack[-1]['stage'] if self._stack else None,
+            'start_s': (time.time() - wall_s if started is None else started) - self.started,
+            **counts,
+            'wall_s': wall_s,
+            'cpu_s': cpu_s,
+        })
+
+    def _reset_peak(self):
+        # credit the peak so far to every open stage, then start a new one (caller holds _lock)
+        _, peak = tracemalloc.get_traced_memory()
+        for record in self._open:
+            record['_peak'] = max(record['_peak'], peak)
+        tracemalloc.reset_peak()
+
+    def to_dict(self):
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'total_wall_s': time.time() - self.started,
+            'stages': self.stages,
+        }
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+
+
+@contextmanager
+def run(report_path: str = None, profile_dir: str = None, trace_memory: bool = None):
+    """
+    Collects every stage() inside the block into one RunReport, written to
+    report_path. tracemalloc slows everything traced (imports included), so
+    memory is only traced when asked for; trace_memory defaults to whether a
+    report is written at all.
+    """
+    global _active
+    if trace_memory is None:
+        trace_memory = report_path is not None
+    previous, _active = _active, RunReport(profile_dir, trace_memory)
+    # trace for the whole run so concurrent stages do not start/stop it under each other
+    own_tracing = trace_memory and not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    try:
+        yield _active
+    finally:
+        report, _active = _active, previous
+        if own_tracing:
+            tracemalloc.stop()
+        if report_path:
+            report.write(report_path)
+
+
+@contextmanager
+def stage(name: str, **counts):
+    """Stage of the active run; a no-op (yielding a scratch dict) when no run is active."""
+    if _active is None:
+        yield dict(counts)
+    else:
+        with _active.stage(name, **counts) as record:
+            yield record
+
+
+def add_stage(name: str, wall_s: float, cpu_s: float, started: float = None, **counts):
+    """RunReport.add on the active run; a no-op when no run is active."""
+    if _active is not None:
+        _active.add(name, wall_s, cpu_s, started, **counts)
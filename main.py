@@ -11,10 +11,121 @@
 "Region 8: Colorado, Montana, North Dakota, South Dakota, Utah, Wyoming; "
 "Region 9: Arizona, California, Hawaii, Nevada; Region 10: Alaska, Idaho, Oregon, Washington."
 
-from model import Model
+import sys
+import pandas as pd
+from clean import (CACHE_PARAMS, ENCODING_PARAMS_PATH, aggregate, clean_aggregated, clean_data, convert,
+                   load_encoding_params, pin_encoding_params, write_encoded)
+from model import BUNDLE_PATH, MANIFEST_PATH, Model, trained_mode
+from model_bundle import bundle_models
+from model_utils import Model_utils
+from pipeline import Pipeline, Stage
+from instrument import run
 
-model = Model(True)
-model.test_models()
+SOURCE = 'covid_data.csv'
 
-for feature in model.poly_feature_names:
-    model.graph_feature(feature)
\ No newline at end of file
+
+def _clean(path, fill_values=None, **cache_params):
+    # cache_params only feed the stage key, so bumping them re-runs the clean
+    return clean_data(path, fill_values=fill_values)
+
+
+def _clean_aggregated(path, chunksize, fill_values=None, **cache_params):
+    return clean_aggregated(path, chunksize, fill_values)
+
+
+def _encode(aggregated, rate_scaling=None, vocabulary=None):
+    if rate_scaling is None:
+        # first encode: pin this data's fills, scaling and dummy vocabulary for every later run
+        pinned = pin_encoding_params(aggregated)
+        rate_scaling, vocabulary = pinned['rate_scaling'], pinned['vocabulary']
+    return write_encoded(convert(aggregated, vocabulary=vocabulary, rate_scaling=rate_scaling))
+
+
+def _window(encoded, split='window', sparse=False):
+    return Model_utils.preprocess(encoded.reset_index(drop=True), 2, sparse=sparse, split=split)
+
+
+def _train(windowed, encoded, mode='cold', n_jobs=1):
+    windows, poly_feature_names = windowed
+    models, extras = Model_utils.train_mode(windows, 'models/model_month_{}.pkl', mode,
+                                            n_jobs=n_jobs, manifest_path=MANIFEST_PATH)
+    bundle_models(BUNDLE_PATH, models, poly_feature_names, metadata={
+        'source': 'df_encoded.csv',
+        'input_features': list(encoded.columns.drop('crude_COVID_rate')),
+        'mode': mode,
+        'alpha': [m.alpha for m in models],
+        'n_iter': [int(m.n_iter_) for m in models],
+    }, arrays=extras if mode == 'path' else None)
+    return models, extras
+
+
+def _model(windowed, trained):
+    models, extras = trained
+    # path mode's alpha grid and coefficients, so a report can render any point on the path
+    path = {name: extras[name] for name in ('alphas', 'coef_path', 'intercept_path') if name in extras}
+    return Model.from_parts(*windowed, models, **path)
+
+
+def _evaluate(windowed, trained):
+    scores = _model(windowed, trained).test_models()
+    return pd.DataFrame(scores, columns=['mse', 'r2']).rename_axis('window')
+
+
+def _report(windowed, trained, output='coefficient_report.pdf', alpha=None):
+    # Every non-zero coefficient trajectory, rendered headlessly into one PDF
+    return _model(windowed, trained).render_features(output, alpha=alpha)
+
+
+def build_pipeline(source=SOURCE, n_jobs=1, report_output='coefficient_report.pdf', chunksize=None,
+                   mode=None, sparse=False, report_alpha=None):
+    """
+    ingest/clean -> aggregate -> encode -> window -> train -> evaluate | report.
+    With chunksize, clean and aggregate run fused over chunks of the source
+    (one 'aggregate' stage), so memory does not grow with the raw file.
+    mode is one of Model_utils' TRAINING_MODES; None reuses the mode of the
+    bundle already trained, so evaluating or reporting never retrains it
+    another way. n_jobs does not change the models, so it is not part of the
+    train key. report_alpha renders the coefficients at that point of a
+    path-mode model's regularization path. sparse builds the design
+    matrix as CSR, for encodings with many dummy columns. The encoding's
+    fills, rate scaling and dummy vocabulary are the ones pinned by the
+    first encode (see clean.ENCODING_PARAMS_PATH).
+    """
+    if mode is None:
+        mode = trained_mode()
+    pinned = load_encoding_params() or {}
+    fill_values = pinned.get('fill_values')
+    if chunksize is None:
+        ingest = [
+            Stage('clean', _clean, sources=[source],
+                  params={'path': source, 'fill_values': fill_values, **CACHE_PARAMS}),
+            Stage('aggregate', aggregate, inputs=['clean']),
+        ]
+    else:
+        ingest = [
+            Stage('aggregate', _clean_aggregated, sources=[source],
+                  params={'path': source, 'chunksize': chunksize, 'fill_values': fill_values, **CACHE_PARAMS}),
+        ]
+    # Until the params are pinned, the encode stage writes them (and is re-run if they go missing)
+    encoded_outputs = ['df_encoded.csv'] + ([] if pinned else [ENCODING_PARAMS_PATH])
+    return Pipeline(ingest + [
+        Stage('encode', _encode, inputs=['aggregate'],
+              params={'rate_scaling': pinned.get('rate_scaling'), 'vocabulary': pinned.get('vocabulary')},
+              outputs=encoded_outputs),
+        # the design matrix is cheap to rebuild and large to store
+        Stage('window', _window, inputs=['encode'],
+              params={'split': 'row' if mode == 'gram' else 'window', 'sparse': sparse}, cache=False),
+        Stage('train', _train, inputs=['window', 'encode'], params={'mode': mode}, options={'n_jobs': n_jobs},
+              outputs=[BUNDLE_PATH]),
+        Stage('evaluate', _evaluate, inputs=['window', 'train']),
+        Stage('report', _report, inputs=['window', 'train'],
+              params={'output': report_output, 'alpha': report_alpha}, outputs=[report_output]),
+    ])
+
+
+if __name__ == '__main__':
+    # python main.py [run_report.json]: per-stage timings and memory only when a report path is given
+    with run(sys.argv[1] if len(sys.argv) > 1 else None):
+        results = build_pipeline().run()
+    if 'evaluate' in results:
+        print(results['evaluate'])
@@ -1,58 +1,197 @@
-from model_utils import Model_utils
-import matplotlib.pyplot as plt
-import pandas as pd
-from model_utils import Model_utils
+from model_utils import TRAINING_MODES, Model_utils
+from model_bundle import ModelBundle, bundle_models, nearest_alpha
+from instrument import stage
 import joblib
 import numpy as np
+import os
+import re
+
+BUNDLE_PATH = 'models/model_bundle.bin'
+MANIFEST_PATH = 'models/manifest.json'
+
+
+def trained_mode(path=BUNDLE_PATH):
+    """The training mode recorded in the bundle at path; 'cold' without one, or for migrated pickles."""
+    if not os.path.exists(path):
+        return 'cold'
+    mode = ModelBundle(path).metadata.get('mode')
+    return mode if mode in TRAINING_MODES else 'cold'
 
 
 class Model:
-    def __init__(self, train = False):
+    def __init__(self, train = False, sparse = False, n_jobs = 1, mode = None, alphas = None):
+        # mode is how train=True fits the windows (see Model_utils.train_mode), cold by default;
+        # loading takes the bundle's mode, so the windows are split the way its models were trained
+        if mode is None:
+            mode = 'cold' if train else trained_mode()
+        if mode not in TRAINING_MODES:
+            raise ValueError(f"unknown training mode {mode!r}; expected one of {', '.join(TRAINING_MODES)}")
         df = Model_utils.load_data('df_encoded.csv')
+        self.input_features = df.columns.drop('crude_COVID_rate')
+
+        # gram mode fits from per-month sufficient statistics, which needs row-level splits
+        split = 'row' if mode == 'gram' else 'window'
+        self.windows, self.poly_feature_names = Model_utils.preprocess(df, 2, sparse=sparse, split=split)
 
-        self.windows, self.poly_feature_names = Model_utils.preprocess(df, 1)
+        # Set by path mode: the alpha grid and (window x alpha) coefficients/intercepts
+        self.alphas = self.coef_path = self.intercept_path = None
 
         if train == True:
             print("retraining")
-            self.models = [
-                Model_utils.train_and_save(w[0], w[2], f'models/model_month_{i}.pkl')
-                for i, w in enumerate(self.windows)
-            ]
+            self.models, extras = Model_utils.train_mode(
+                self.windows, 'models/model_month_{}.pkl', mode, n_jobs=n_jobs,
+                manifest_path=MANIFEST_PATH, alphas=alphas
+            )
+            vars(self).update(extras)
+            bundle_models(BUNDLE_PATH, self.models, self.poly_feature_names, metadata={
+                'source': 'df_encoded.csv',
+                'input_features': list(self.input_features),
+                'mode': mode,
+                'alpha': [m.alpha for m in self.models],
+                'n_iter': [int(m.n_iter_) for m in self.models],
+            }, arrays=extras if mode == 'path' else None)
         else:
             print("loading trained model")
-            self.models = [
-                joblib.load(f'models/model_month_{i}.pkl')
-                for i in range(len(self.windows))
-            ]
+            bundle = ModelBundle(BUNDLE_PATH) if os.path.exists(BUNDLE_PATH) else None
+            if bundle is not None and len(bundle) == len(self.windows) \
+                    and list(bundle.feature_names) == list(self.poly_feature_names) \
+                    and bundle.coef.shape[1] == len(self.poly_feature_names):
+                self.models = bundle.models()
+                if bundle.alphas is not None:
+                    self.alphas = bundle.alphas
+                    self.coef_path = bundle.arrays['coef_path']
+                    self.intercept_path = bundle.arrays['intercept_path']
+            else:
+                # Older checkouts only have per-window pickles; read them and migrate
+                self.models = [
+                    joblib.load(f'models/model_month_{i}.pkl')
+                    for i in range(len(self.windows))
+                ]
+                # Pickles trained on another encoding must not be relabelled with these feature names
+                stale = [i for i, m in enumerate(self.models)
+                         if np.ravel(m.coef_).shape[0] != len(self.poly_feature_names)]
+                if stale:
+                    raise ValueError(
+                        f"models/model_month_{stale[0]}.pkl has {np.ravel(self.models[stale[0]].coef_).shape[0]} "
+                        f"coefficients but the encoded data gives {len(self.poly_feature_names)} features; "
+                        "retrain with Model(train=True) or `cli.py train`"
+                    )
+                bundle_models(BUNDLE_PATH, self.models, self.poly_feature_names,
+                              metadata={'source': 'df_encoded.csv', 'mode': 'migrated',
+                                        'input_features': list(self.input_features)})
     
+    @classmethod
+    def from_parts(cls, windows, poly_feature_names, models, input_features=None,
+                   alphas=None, coef_path=None, intercept_path=None):
+        """
+        A Model over windows and models built elsewhere (e.g. by pipeline stages), without loading or training.
+        alphas/coef_path/intercept_path are a path-mode training's regularization path.
+        """
+        model = cls.__new__(cls)
+        model.windows = windows
+        model.poly_feature_names = poly_feature_names
+        model.models = models
+        model.input_features = input_features
+        model.alphas, model.coef_path, model.intercept_path = alphas, coef_path, intercept_path
+        return model
+
     def test_models(self):
-        """Load models with timestamps from pickle files"""
+        """Evaluates every window's model on its test rows; returns [(mse, r2), ...]."""
+        scores = []
         for i in range(len(self.models)):
-            Model_utils.evaluate(self.models[i],self.windows[i][1], self.windows[i][3])
+            _, X_te, _, y_te = self.windows[i]
+            with stage('evaluate', window=i, rows=len(y_te)) as record:
+                record['mse'], record['r2'] = Model_utils.evaluate(self.models[i], X_te, y_te)
+            scores.append((record['mse'], record['r2']))
+        return scores
 
-    def graph_feature(self, feature_name):
-        coefficients = []
+    def coefficient_matrix(self, alpha=None):
+        """
+        (window x feature) coefficients of every model, plus a feature name ->
+        column map. Built once and reused by graph_feature/render_features.
+        With alpha, the coefficients at the nearest alpha of the stored path.
+        """
+        if alpha is not None:
+            if self.coef_path is None:
+                raise ValueError("no regularization path stored; train with mode='path'")
+            self.coefficient_matrix()
+            return self.coef_path[:, nearest_alpha(self.alphas, alpha)], self.feature_index
+        if getattr(self, '_coef_matrix', None) is None:
+            n_features = len(self.poly_feature_names)
+            self._coef_matrix = np.vstack([
+                np.ravel(model.coef_) if hasattr(model, 'coef_') else np.full(n_features, np.nan)
+                for model in self.models
+            ])
+            self.feature_index = {name: j for j, name in enumerate(self.poly_feature_names)}
+        return self._coef_matrix, self.feature_index
 
-        for model in self.models:
-            if not hasattr(model, 'coef_'):
-                coefficients.append(np.nan)
-                continue
+    def feature_coefficients(self, feature_name, alpha=None):
+        """Coefficient of feature_name in every window (NaN if the feature is unknown)."""
+        coef_matrix, feature_index = self.coefficient_matrix(alpha)
+        j = feature_index.get(feature_name)
+        if j is None:
+            return np.full(len(self.models), np.nan)
+        return coef_matrix[:, j]
 
-            # Use the shared feature name list
-            feature_index = np.where(self.poly_feature_names == feature_name)[0]
-            if feature_index.size == 0:
-                coefficients.append(np.nan)
-            else:
-                coef = model.coef_.flatten()[feature_index[0]]
-                coefficients.append(coef)
+    @staticmethod
+    def _draw_coefficients(ax, coefficients, feature_name, alpha=None):
+        ax.plot(range(len(coefficients)), coefficients, 
+                marker='o', linestyle='--', color='tab:blue')
+        suffix = '' if alpha is None else f' (alpha={alpha:.3g})'
+        ax.set_title(f'Coefficient Evolution: {feature_name}{suffix}', pad=20)
+        ax.set_xlabel('Time Window Index', labelpad=15)
+        ax.set_ylabel('Coefficient Value', labelpad=15)
+        ax.grid(True, alpha=0.3)
+
+    def graph_feature(self, feature_name, alpha=None):
+        import matplotlib.pyplot as plt
+
+        coefficients = self.feature_coefficients(feature_name, alpha)
+        if alpha is not None:
+            alpha = self.alphas[nearest_alpha(self.alphas, alpha)]
 
         # Plot
         plt.figure(figsize=(10, 6))
-        plt.plot(range(len(coefficients)), coefficients, 
-                marker='o', linestyle='--', color='tab:blue')
-        plt.title(f'Coefficient Evolution: {feature_name}', pad=20)
-        plt.xlabel('Time Window Index', labelpad=15)
-        plt.ylabel('Coefficient Value', labelpad=15)
-        plt.grid(True, alpha=0.3)
+        self._draw_coefficients(plt.gca(), coefficients, feature_name, alpha)
         plt.tight_layout()
         plt.show()
+
+    def render_features(self, output='coefficient_report.pdf', features=None, skip_zero=True, alpha=None):
+        """
+        Renders coefficient trajectories headlessly in one pass: a multipage PDF
+        when output ends in .pdf, otherwise one PNG per feature in the output
+        directory. skip_zero leaves out features that are zero in every window;
+        alpha picks a point on the stored regularization path.
+        Returns the names of the rendered features.
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        coef_matrix, feature_index = self.coefficient_matrix(alpha)
+        if alpha is not None:
+            alpha = self.alphas[nearest_alpha(self.alphas, alpha)]
+        if features is None:
+            features = self.poly_feature_names
+        if skip_zero:
+            nonzero = np.any(np.nan_to_num(coef_matrix) != 0, axis=0)
+            features = [f for f in features if f in feature_index and nonzero[feature_index[f]]]
+
+        pdf = PdfPages(output) if output.endswith('.pdf') else None
+        if pdf is None:
+            os.makedirs(output, exist_ok=True)
+        try:
+            for feature_name in features:
+                # Figure objects are not registered with pyplot, so nothing opens a window
+                fig = Figure(figsize=(10, 6))
+                self._draw_coefficients(fig.subplots(), self.feature_coefficients(feature_name, alpha),
+                                        feature_name, alpha)
+                fig.tight_layout()
+                if pdf is not None:
+                    pdf.savefig(fig)
+                else:
+                    safe_name = re.sub(r'[^\w.-]+', '_', str(feature_name))
+                    fig.savefig(os.path.join(output, f'Coefficient_Evolution_{safe_name}.png'))
+        finally:
+            if pdf is not None:
+                pdf.close()
+        return list(features)
@@ -0,0 +1,173 @@
+# model_bundle.py
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+MAGIC = b'MADABNDL'
+BUNDLE_VERSION = 1
+_ALIGN = 64
+_PREFIX = struct.Struct('<8sII')  # magic, version, header length
+
+
+class WindowModel:
+    """Read-only stand-in for a fitted Lasso, backed by one row of a bundle."""
+    def __init__(self, coef, intercept):
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def predict(self, X):
+        return X @ self.coef_ + self.intercept_
+
+
+def nearest_alpha(alphas, alpha):
+    """Index of the grid alpha closest to alpha on a log scale."""
+    alphas = np.asarray(alphas, dtype=np.float64)
+    return int(np.argmin(np.abs(np.log(alphas) - np.log(alpha))))
+
+
+class ModelBundle:
+    """
+    All window models in a single file: a stacked (window x feature) coefficient
+    matrix, the intercepts, the feature names and training metadata. The file
+    is opened once and memory-mapped; arrays are zero-copy views into the map.
+    """
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = _PREFIX.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a model bundle")
+        if version > BUNDLE_VERSION:
+            raise ValueError(f"{path} has bundle version {version}; this code reads up to {BUNDLE_VERSION}")
+        header = json.loads(self._map[_PREFIX.size:_PREFIX.size + header_len])
+
+        self.version = version
+        self.feature_names = np.array(header['feature_names'], dtype=object)
+        self.metadata = header['metadata']
+        self.arrays = {
+            name: np.frombuffer(
+                self._map, dtype=spec['dtype'], count=int(np.prod(spec['shape'])), offset=spec['offset']
+            ).reshape(spec['shape'])
+            for name, spec in header['arrays'].items()
+        }
+        self.coef = self.arrays['coef']
+        self.intercept = self.arrays['intercept']
+        # Bundles trained in path mode also hold (window x alpha x feature) coefficients
+        self.alphas = self.arrays.get('alphas')
+
+    def __len__(self):
+        return self.coef.shape[0]
+
+    def at_alpha(self, alpha=None):
+        """(coef, intercept) at the path alpha nearest to alpha; the trained default when alpha is None."""
+        if alpha is None:
+            return self.coef, self.intercept
+        if self.alphas is None:
+            raise ValueError("this bundle holds no regularization path; train with mode='path'")
+        j = nearest_alpha(self.alphas, alpha)
+        return self.arrays['coef_path'][:, j], self.arrays['intercept_path'][:, j]
+
+    def models(self, alpha=None):
+        """One WindowModel per window, sharing this bundle's memory."""
+        coef, intercept = self.at_alpha(alpha)
+        return [WindowModel(coef[i], intercept[i]) for i in range(len(self))]
+
+    def predict(self, X, alpha=None):
+        """(rows x windows) predictions of every window model in one matrix multiply."""
+        coef, intercept = self.at_alpha(alpha)
+        return X @ coef.T + intercept
+
+
+def poly2_names(input_features):
+    """PolynomialFeatures(degree=2).get_feature_names_out(input_features), without sklearn."""
+    names = ['1'] + [str(f) for f in input_features]
+    for i, a in enumerate(input_features):
+        names.append(f'{a}^2')
+        names.extend(f'{a} {b}' for b in input_features[i + 1:])
+    return names
+
+
+def poly2_expand(X):
+    """
+    Degree-2 polynomial expansion of X (rows x inputs) in PolynomialFeatures'
+    column order: bias, the inputs, then x_i * x_j for i <= j. NumPy only, so
+    scoring a bundle does not have to import sklearn.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n, d = X.shape
+    out = np.empty((n, 1 + d + d * (d + 1) // 2))
+    out[:, 0] = 1.0
+    out[:, 1:d + 1] = X
+    col = d + 1
+    for i in range(d):
+        out[:, col:col + d - i] = X[:, i:] * X[:, i:i + 1]
+        col += d - i
+    return out
+
+
+def save_bundle(path: str, coef, intercept, feature_names, metadata=None, arrays=None):
+    """
+    Writes a bundle. coef is (windows x features), intercept (windows,);
+    arrays holds any extra named arrays to store alongside them.
+    """
+    arrays = {'coef': np.asarray(coef, dtype=np.float64),
+              'intercept': np.asarray(intercept, dtype=np.float64),
+              **(arrays or {})}
+    specs = {name: {'dtype': a.dtype.str, 'shape': list(a.shape)} for name, a in arrays.items()}
+
+    def encode_header():
+        return json.dumps({
+            'feature_names': [str(name) for name in feature_names],
+            'metadata': metadata or {},
+            'arrays': specs,
+        }).encode()
+
+    # Offsets depend on the header length and the header holds the offsets, so
+    # lay out with placeholders first and re-encode once the sizes are known
+    for name in specs:
+        specs[name]['offset'] = 0
+    header = encode_header()
+    while True:
+        offset = _PREFIX.size + len(header)
+        for name, a in arrays.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            specs[name]['offset'] = offset
+            offset += a.nbytes
+        laid_out = encode_header()
+        if len(laid_out) == len(header):
+            header = laid_out
+            break
+        header = laid_out
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, BUNDLE_VERSION, len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.write(b'\0' * (specs[name]['offset'] - f.tell()))
+            f.write(np.ascontiguousarray(a).tobytes())
+    os.replace(tmp, path)
+
+
+def stack_models(models, alpha=None):
+    """
+    (window x feature) coefficients and (window,) intercepts of a list of
+    fitted models (anything with coef_/intercept_) or a ModelBundle; alpha
+    picks a point on a path-mode bundle's path.
+    """
+    if hasattr(models, 'at_alpha'):
+        return models.at_alpha(alpha)
+    if alpha is not None:
+        raise ValueError("alpha needs a ModelBundle trained with mode='path'")
+    coef = np.vstack([np.ravel(m.coef_) for m in models])
+    intercept = np.array([float(np.ravel(m.intercept_)[0]) for m in models])
+    return coef, intercept
+
+
+def bundle_models(path: str, models, feature_names, metadata=None, arrays=None):
+    """Stacks fitted per-window models (anything with coef_/intercept_) into a bundle."""
+    save_bundle(path, *stack_models(models), feature_names, metadata, arrays)
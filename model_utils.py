@@ -1,53 +1,101 @@
 # model_utils.py
+import copy
+import hashlib
+import json
 import os
+import time
+import warnings
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import solve_triangular
 import joblib
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+from artifact_cache import cached_frame, file_digest
+from clean import encoded_dtypes
+from model_bundle import nearest_alpha, stack_models
+from instrument import add_stage, stage
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, PolynomialFeatures
 from sklearn.linear_model import Lasso
 from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.exceptions import ConvergenceWarning
+
+# Regularization grid of train_path: 1 down to 1e-3 in quarter decades (0.1 is on it)
+DEFAULT_ALPHAS = 10.0 ** (-np.arange(13) / 4)
+
+# Ways of fitting the windows; gram needs windows built with split='row'
+TRAINING_MODES = ('cold', 'warm_start', 'gram', 'incremental', 'path')
+
 
 class Model_utils:
     def load_data(csv_path: str) -> pd.DataFrame:
-        """Load your encoded dataframe from CSV."""
-        return pd.read_csv(csv_path)
+        """Load your encoded dataframe, from the columnar cache when the CSV is unchanged."""
+        with stage('load') as record:
+            df, _ = cached_frame('df_encoded', lambda: pd.read_csv(csv_path), sources=[csv_path])
+            # A parsed CSV comes back int64/float64; cast to convert's schema so a cache
+            # miss and a frame seeded by clean.write_encoded are bitwise identical
+            df = df.astype(encoded_dtypes(df.columns))
+            record.update(rows=len(df), features=df.shape[1])
+        return df
 
     def preprocess(
         df: pd.DataFrame,
         window_size,
         test_size=0.25, 
-        random_state=42
+        random_state=42,
+        sparse=False,
+        split='window',
+        stride=1,
+        degree=2
     ):
+        """
+        Windows of window_size consecutive months, starting every stride months,
+        over a degree-`degree` polynomial expansion.
+        split='window' draws a fresh train/test split inside every window;
+        split='row' holds out each row once, so a window's training rows are the
+        union of its months' training rows (what GramEngine relies on).
+        """
         print(df.columns)
-        poly = PolynomialFeatures(degree=2)
+        with stage('preprocess', rows=len(df), features=df.shape[1] - 1) as record:
+            poly = PolynomialFeatures(degree=degree)
 
-        X_raw = df.drop(columns=['crude_COVID_rate'])  # still a DataFrame
+            X_raw = df.drop(columns=['crude_COVID_rate'])  # still a DataFrame
+            if sparse:
+                # CSR in, CSR out: the one-hot columns and their interactions stay sparse
+                X_raw = sp.csr_matrix(X_raw.astype(pd.SparseDtype('float64', 0.0)).sparse.to_coo())
 
-        poly.fit(X_raw)  # fit on the DataFrame so it knows column names
-        X = poly.transform(X_raw)  # now X becomes a NumPy array
-        poly_feature_names = poly.get_feature_names_out(X_raw.columns)
-        windows = []
-        unique_times = df['time'].unique()
+            poly.fit(X_raw)
+            poly_feature_names = poly.get_feature_names_out(df.columns.drop('crude_COVID_rate'))
 
-        window_size = 2  # explicitly 2-month chunks
+            # Sort rows by time once (stable, so rows keep their order within a month)
+            # and expand the whole frame once; every window is a slice of this matrix
+            order = np.argsort(df['time'].to_numpy(), kind='stable')
+            times = df['time'].to_numpy()[order]
+            X = poly.transform(X_raw[order] if sparse else X_raw.iloc[order])  # NumPy array, or CSR when sparse
+            y = df['crude_COVID_rate'].iloc[order]
 
-        for i in range(len(unique_times) - window_size + 1):  # still increments by 1 month
-            start_time = unique_times[i]
-            end_time = unique_times[i + 1]  # always span 2 months
+            unique_times = np.unique(times)
 
-            window_df = df[(df['time'] >= start_time) & (df['time'] <= end_time)]
-            X_window = window_df.drop(columns=['crude_COVID_rate'])
-            y_window = window_df['crude_COVID_rate']
-            
-            X_window_poly = poly.fit_transform(X_window)
+            # window i spans unique_times[i * stride] .. unique_times[i * stride + window_size - 1]
+            month_bounds = list(zip(
+                np.searchsorted(times, unique_times, side='left'),
+                np.searchsorted(times, unique_times, side='right')
+            ))
+            starts = range(0, max(len(unique_times) - window_size + 1, 0), stride)
+            window_months = [(i, i + window_size - 1) for i in starts]
 
-            X_tr, X_te, y_tr, y_te = train_test_split(
-                X_window_poly, y_window, test_size=test_size, random_state=random_state
-            )
-            
-            windows.append((X_tr, X_te, y_tr, y_te))
+            train_mask = None
+            if split == 'row':
+                _, test_rows = train_test_split(
+                    np.arange(len(y)), test_size=test_size, random_state=random_state
+                )
+                train_mask = np.ones(len(y), dtype=bool)
+                train_mask[test_rows] = False
 
+            windows = Windows(X, y, month_bounds, window_months, test_size, random_state, train_mask)
+            record.update(poly_features=X.shape[1], windows=len(windows))
         return windows, poly_feature_names
 
     def train_and_save(
@@ -62,43 +110,305 @@ class Model_utils:
         """
         model = Lasso(alpha=alpha, max_iter=max_iter)
         model.fit(X_train, y_train)
+        # Fitted arrays can carry dtype objects copied by unpickling (in a pool worker), and
+        # pickle writes out each distinct one; NumPy's own dtypes keep the file the same
+        # whichever process fitted it
+        for name, value in list(vars(model).items()):
+            if name.endswith('_') and isinstance(value, (np.ndarray, np.generic)):
+                setattr(model, name, value.astype(value.dtype.str))
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
         joblib.dump(model, model_path)
         return model
 
+    def train_windows(
+        windows,
+        path_template: str,
+        n_jobs: int = 1,
+        backend: str = 'loky',
+        blas_threads: int = 1,
+        alpha: float = 0.1,
+        max_iter: int = 10_000,
+        indices=None
+    ):
+        """
+        Trains and saves one model per window (or per window in indices),
+        returning them in window order. path_template is formatted with the
+        window index. With n_jobs != 1 the fits run in a joblib pool, each
+        worker capped to blas_threads BLAS threads.
+        """
+        if indices is None:
+            indices = range(len(windows))
+        if n_jobs == 1:
+            models = []
+            for i in indices:
+                w = windows[i]
+                with stage('fit', window=i, rows=w[0].shape[0], features=w[0].shape[1]):
+                    models.append(Model_utils.train_and_save(w[0], w[2], path_template.format(i), alpha, max_iter))
+            return models
+        # windows are materialized lazily as jobs are dispatched
+        shapes = {}
+        def jobs():
+            for i in indices:
+                w = windows[i]
+                shapes[i] = w[0].shape
+                yield delayed(_train_window)(w[0], w[2], path_template.format(i), alpha, max_iter, blas_threads)
+        with stage('fit_pool', windows=len(indices), n_jobs=n_jobs):
+            results = Parallel(n_jobs=n_jobs, backend=backend)(jobs())
+            # workers run in other processes, so each times its own fit and the entries are added here
+            for i, (model, timing) in zip(indices, results):
+                add_stage('fit', **timing, window=i, rows=shapes[i][0], features=shapes[i][1])
+        return [model for model, _ in results]
+
+    def train_incremental(
+        windows,
+        path_template: str,
+        manifest_path: str,
+        n_jobs: int = 1,
+        alpha: float = 0.1,
+        max_iter: int = 10_000
+    ):
+        """
+        Like train_windows, but skips windows whose training rows and
+        hyperparameters hash to the same value recorded in the manifest, and
+        whose model file is still the one this function wrote (other training
+        modes save to the same paths). Returns (models, refitted window indices).
+        """
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        params = {'alpha': alpha, 'max_iter': max_iter}
+        entries, todo = {}, []
+        for i in range(len(windows)):
+            X_tr, _, y_tr, _ = windows[i]
+            entry = {'hash': _window_digest(X_tr, y_tr), **params, 'path': path_template.format(i)}
+            entries[str(i)] = entry
+            old = manifest.get(str(i), {})
+            if {k: old.get(k) for k in entry} != entry or not os.path.exists(entry['path']) \
+                    or old.get('model_digest') != file_digest(entry['path']):
+                todo.append(i)
+            else:
+                entry['model_digest'] = old['model_digest']
+
+        fitted = dict(zip(todo, Model_utils.train_windows(
+            windows, path_template, n_jobs=n_jobs, alpha=alpha, max_iter=max_iter, indices=todo
+        )))
+        for i in todo:
+            entries[str(i)]['model_digest'] = file_digest(entries[str(i)]['path'])
+        models = [fitted[i] if i in fitted else joblib.load(entries[str(i)]['path']) for i in range(len(windows))]
+
+        # Written last, so an interrupted run refits whatever it had not recorded
+        os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+        with open(manifest_path, 'w') as f:
+            json.dump(entries, f, indent=1)
+        print(f"refitted {len(todo)} of {len(windows)} windows")
+        return models, todo
+
+    def fit_report(models, max_iter: int = 10_000):
+        """Iteration count, duality gap and convergence of every window's fit, in window order."""
+        return [{
+            'window': i,
+            'n_iter': int(model.n_iter_),
+            'converged': bool(model.n_iter_ < max_iter),
+            'dual_gap': float(model.dual_gap_),
+        } for i, model in enumerate(models)]
+
+    def train_sequential(
+        windows,
+        path_template: str,
+        alpha: float = 0.1,
+        max_iter: int = 10_000
+    ):
+        """
+        Trains and saves the windows in time order, starting each fit's coordinate
+        descent from the previous window's coefficients. Returns (models, report),
+        where report holds the iteration count and convergence of every window
+        (see fit_report).
+        """
+        model = Lasso(alpha=alpha, max_iter=max_iter, warm_start=True)
+        models = []
+        for i, w in enumerate(windows):
+            with stage('fit', window=i, rows=w[0].shape[0], features=w[0].shape[1]) as record:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', ConvergenceWarning)
+                    model.fit(w[0], w[2])
+                record['n_iter'] = int(model.n_iter_)
+
+            fitted = copy.deepcopy(model)
+            fitted.warm_start = False
+            model_path = path_template.format(i)
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            joblib.dump(fitted, model_path)
+            models.append(fitted)
+
+        report = Model_utils.fit_report(models, max_iter)
+        for entry in report:
+            print(f"window {entry['window']}: {entry['n_iter']} iterations"
+                  f"{'' if entry['converged'] else ' (not converged)'}")
+        return models, report
+
+    def train_from_stats(
+        windows,
+        path_template: str,
+        alpha: float = 0.1,
+        max_iter: int = 10_000
+    ):
+        """
+        Trains and saves every window from per-month Gram matrices (see GramEngine).
+        Needs windows built with preprocess(..., split='row').
+        """
+        with stage('gram_stats', rows=windows.X.shape[0], features=windows.X.shape[1]):
+            engine = GramEngine(windows)
+        models = []
+        for i in range(len(windows)):
+            with stage('fit', window=i, features=windows.X.shape[1]):
+                model = engine.fit(i, alpha=alpha, max_iter=max_iter)
+            model_path = path_template.format(i)
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            joblib.dump(model, model_path)
+            models.append(model)
+        return models
+
+    def train_path(
+        windows,
+        path_template: str,
+        alphas=None,
+        alpha: float = 0.1,
+        max_iter: int = 10_000
+    ):
+        """
+        Fits every window's whole Lasso path over alphas (largest first, each
+        fit warm-started from the last) from one X^T X of its training rows.
+        The model at the grid alpha nearest to alpha is saved per window.
+        Returns (models, alphas, coef_path (window x alpha x feature), intercept_path).
+        """
+        alphas = np.sort(np.asarray(DEFAULT_ALPHAS if alphas is None else alphas, dtype=np.float64))[::-1]
+        j = nearest_alpha(alphas, alpha)
+        models, coef_path, intercept_path = [], [], []
+        for i in range(len(windows)):
+            X_tr, _, y_tr, _ = windows[i]
+            with stage('fit_path', window=i, rows=X_tr.shape[0], features=X_tr.shape[1], alphas=len(alphas)):
+                path = lasso_path_from_stats(*design_stats(X_tr, y_tr), alphas, max_iter=max_iter)
+            coef_path.append(np.vstack([m.coef_ for m in path]))
+            intercept_path.append([m.intercept_ for m in path])
+
+            model_path = path_template.format(i)
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            joblib.dump(path[j], model_path)
+            models.append(path[j])
+        return models, alphas, np.array(coef_path), np.array(intercept_path)
+
+    def train_mode(
+        windows,
+        path_template: str,
+        mode: str = 'cold',
+        n_jobs: int = 1,
+        manifest_path: str = 'models/manifest.json',
+        alphas=None
+    ):
+        """
+        Trains and saves every window the way mode (one of TRAINING_MODES) says.
+        Returns (models, extras), extras holding what the mode reports besides
+        the models: alphas/coef_path/intercept_path (path), fit_report
+        (cold and warm_start) or refitted (incremental).
+        """
+        if mode == 'path':
+            # one X^T X per window, warm-started down the alpha grid
+            models, alphas, coef_path, intercept_path = Model_utils.train_path(windows, path_template, alphas)
+            return models, {'alphas': alphas, 'coef_path': coef_path, 'intercept_path': intercept_path}
+        if mode == 'gram':
+            return Model_utils.train_from_stats(windows, path_template), {}
+        if mode == 'warm_start':
+            # adjacent windows share months, so each fit starts from the last one
+            models, fit_report = Model_utils.train_sequential(windows, path_template)
+            return models, {'fit_report': fit_report}
+        if mode == 'incremental':
+            # only windows whose rows or hyperparameters changed are refitted
+            models, refitted = Model_utils.train_incremental(windows, path_template, manifest_path, n_jobs=n_jobs)
+            return models, {'refitted': refitted}
+        if mode == 'cold':
+            models = Model_utils.train_windows(windows, path_template, n_jobs=n_jobs)
+            return models, {'fit_report': Model_utils.fit_report(models)}
+        raise ValueError(f"unknown training mode {mode!r}; expected one of {', '.join(TRAINING_MODES)}")
+
     def load_model(model_path: str):
         """Loads and returns a joblib'ed model."""
         return joblib.load(model_path)
 
 
-    def predict_new(
+    def design_matrix(
         df_new: pd.DataFrame,
         x_scaler: StandardScaler,
-        y_scaler: StandardScaler,
-        poly: PolynomialFeatures,
-        model: Lasso
+        poly: PolynomialFeatures
     ):
         """
-        Given a new DataFrame with the same features (including 'time'),
-        returns predictions on the original target scale.
+        Standardizes and polynomial-expands df_new the way predict_new does.
+        x_scaler may be None when the features were stored unscaled.
         """
         # drop target if present
         if 'crude_COVID_rate' in df_new.columns:
             df_new = df_new.drop('crude_COVID_rate', axis=1)
 
         # standardize X
-        X_std = pd.DataFrame(x_scaler.transform(df_new), columns=df_new.columns)
-
+        if x_scaler is not None:
+            df_new = pd.DataFrame(x_scaler.transform(df_new), columns=df_new.columns)
 
         # polynomial transform
-        X_poly = poly.transform(X_std)
+        return poly.transform(df_new)
+
+    def predict_new(
+        df_new: pd.DataFrame,
+        x_scaler: StandardScaler,
+        y_scaler: StandardScaler,
+        poly: PolynomialFeatures,
+        model: Lasso
+    ):
+        """
+        Given a new DataFrame with the same features (including 'time'),
+        returns predictions on the original target scale.
+        """
+        X_poly = Model_utils.design_matrix(df_new, x_scaler, poly)
 
         # predict & invert scaling
         y_pred_std = model.predict(X_poly).reshape(-1, 1)
+        if y_scaler is None:
+            return y_pred_std.ravel()
         y_pred     = y_scaler.inverse_transform(y_pred_std).ravel()
 
         return y_pred
 
+    def stack_models(models, alpha=None):
+        """
+        (window x feature) coefficients and (window,) intercepts of a model list
+        or ModelBundle; alpha picks a point on a path-mode bundle's path.
+        """
+        return stack_models(models, alpha)
+
+    def predict_all(
+        df_new: pd.DataFrame,
+        x_scaler: StandardScaler,
+        y_scaler: StandardScaler,
+        poly: PolynomialFeatures,
+        models,
+        alpha=None
+    ):
+        """
+        predict_new for every window model at once: transforms df_new a single
+        time and returns a (rows x windows) array from one matrix multiply.
+        models is a list of fitted models or a ModelBundle; alpha selects a
+        point on a path-mode bundle's regularization path.
+        """
+        X_poly = Model_utils.design_matrix(df_new, x_scaler, poly)
+        coef, intercept = Model_utils.stack_models(models, alpha)
+
+        y_pred_std = X_poly @ coef.T + intercept
+        if y_scaler is None:
+            return np.asarray(y_pred_std)
+        # the target scaler is fitted on one column; undo it on every window's column
+        return y_scaler.inverse_transform(np.asarray(y_pred_std).reshape(-1, 1)).reshape(y_pred_std.shape)
+
 
     def evaluate(model, X_test: np.ndarray, y_test: np.ndarray):
         """
@@ -109,3 +419,163 @@ class Model_utils:
         r2  = r2_score(y_test, y_pred)
         print(f"MSE: {mse:.4f} | R²: {r2:.4f}")
         return mse, r2
+
+
+def design_stats(X, y):
+    """(n, column sums, sum of y, X^T X, X^T y) of a dense or sparse design."""
+    y = np.asarray(y, dtype=np.float64)
+    gram = X.T @ X
+    return (X.shape[0], np.asarray(X.sum(axis=0)).ravel(), y.sum(),
+            gram.toarray() if sp.issparse(gram) else np.asarray(gram), np.asarray(X.T @ y).ravel())
+
+
+def _window_digest(X_train, y_train):
+    """sha256 of a window's training rows and targets."""
+    h = hashlib.sha256()
+    if sp.issparse(X_train):
+        X_train = X_train.tocsr()
+        parts = (X_train.data, X_train.indices, X_train.indptr)
+    else:
+        parts = (np.ascontiguousarray(X_train),)
+    for part in parts + (np.ascontiguousarray(np.asarray(y_train, dtype=np.float64)),):
+        h.update(str(part.shape).encode())
+        h.update(part.tobytes())
+    return h.hexdigest()
+
+
+def _train_window(X_train, y_train, model_path, alpha, max_iter, blas_threads):
+    """Pool worker for Model_utils.train_windows: the model and the worker's timing of its fit."""
+    started, wall, cpu = time.time(), time.perf_counter(), time.process_time()
+    with threadpool_limits(limits=blas_threads):
+        model = Model_utils.train_and_save(X_train, y_train, model_path, alpha, max_iter)
+    timing = {'wall_s': time.perf_counter() - wall, 'cpu_s': time.process_time() - cpu, 'started': started}
+    return model, timing
+
+
+class Windows:
+    """
+    Lazy sequence of (X_tr, X_te, y_tr, y_te) splits over rolling time windows.
+    Each window is a row range of one shared expanded matrix; its split is
+    only materialized when the window is accessed.
+    """
+    def __init__(self, X, y, month_bounds, window_months, test_size=0.25, random_state=42, train_mask=None):
+        self.X = X
+        self.y = y
+        self.month_bounds = month_bounds
+        self.window_months = window_months
+        self.bounds = [(month_bounds[first][0], month_bounds[last][1]) for first, last in window_months]
+        self.test_size = test_size
+        self.random_state = random_state
+        self.train_mask = train_mask
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __getitem__(self, i):
+        start, stop = self.bounds[i]
+        X_w, y_w = self.X[start:stop], self.y.iloc[start:stop]
+        if self.train_mask is not None:
+            train = self.train_mask[start:stop]
+            return X_w[train], X_w[~train], y_w[train], y_w[~train]
+        return tuple(train_test_split(
+            X_w, y_w, test_size=self.test_size, random_state=self.random_state
+        ))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class GramEngine:
+    """
+    Per-month sufficient statistics of the training rows: row count, column
+    sums, X^T X and X^T y. They are computed in one pass over the rows; a
+    window's Lasso is then fitted from the sum of its months' statistics, so
+    the cost of a fit depends on the feature count and not on the row count.
+
+    Months are stored separately and summed per window rather than kept as
+    prefix sums: the squared polynomial terms are large and differencing
+    prefix sums would cancel most of their precision.
+    """
+    def __init__(self, windows, all_rows=False):
+        """all_rows=True takes every row of a month instead of only its training rows."""
+        if windows.train_mask is None and not all_rows:
+            raise ValueError("GramEngine needs row-level splits; use preprocess(..., split='row')")
+        X = windows.X
+        y = windows.y.to_numpy(dtype=np.float64)
+        n_months, p = len(windows.month_bounds), X.shape[1]
+
+        self.window_months = windows.window_months
+        self.count = np.zeros(n_months)
+        self.sum_x = np.zeros((n_months, p))
+        self.sum_y = np.zeros(n_months)
+        self.xtx = np.zeros((n_months, p, p))
+        self.xty = np.zeros((n_months, p))
+
+        for m, (start, stop) in enumerate(windows.month_bounds):
+            if all_rows:
+                rows = np.arange(start, stop)
+            else:
+                rows = start + np.flatnonzero(windows.train_mask[start:stop])
+            X_m, y_m = X[rows], y[rows]
+            self.count[m] = len(rows)
+            self.sum_x[m] = np.asarray(X_m.sum(axis=0)).ravel()
+            self.sum_y[m] = y_m.sum()
+            gram = X_m.T @ X_m
+            self.xtx[m] = gram.toarray() if sp.issparse(gram) else gram
+            self.xty[m] = X_m.T @ y_m
+
+    def window_stats(self, i):
+        """(n, sum_x, sum_y, X^T X, X^T y) of window i."""
+        first, last = self.window_months[i]
+        months = slice(first, last + 1)
+        return (self.count[months].sum(), self.sum_x[months].sum(axis=0), self.sum_y[months].sum(),
+                self.xtx[months].sum(axis=0), self.xty[months].sum(axis=0))
+
+    def fit(self, i, alpha=0.1, max_iter=10_000, tol=1e-4):
+        """Lasso(alpha) with intercept for window i, fitted from its statistics only."""
+        return self.path(i, [alpha], max_iter, tol)[0]
+
+    def path(self, i, alphas, max_iter=10_000, tol=1e-4):
+        """Lasso models for window i at every alpha, one warm-started path from its statistics."""
+        return lasso_path_from_stats(*self.window_stats(i), alphas, max_iter=max_iter, tol=tol)
+
+
+def lasso_path_from_stats(n, sum_x, sum_y, xtx, xty, alphas, max_iter=10_000, tol=1e-4):
+    """
+    Lasso models with intercept, in the order of alphas, from the row count,
+    column sums, X^T X and X^T y of the training rows. The path is solved from
+    the largest alpha down, each fit starting from the previous coefficients.
+    """
+    p = len(sum_x)
+    x_mean, y_mean = sum_x / n, sum_y / n
+    gram = xtx - n * np.outer(x_mean, x_mean)  # centered X^T X
+    xy = xty - n * x_mean * y_mean             # centered X^T y
+
+    # A p x p design with the same Gram matrix and X^T y has the same Lasso
+    # objective up to a constant, once alpha is rescaled from n rows to p rows.
+    # The Cholesky factor is one; the Gram of a polynomial expansion is singular
+    # (x^2 == x for dummies, the centered bias column is zero), so a ridge of
+    # 1e-10 of each column's own scale keeps it positive definite.
+    diag = np.diag(gram).copy()
+    gram[np.diag_indices(p)] += 1e-10 * np.where(diag > 0, diag, max(diag.max(), 1.0))
+    L = np.linalg.cholesky(gram)
+    X_s = L.T
+    y_s = solve_triangular(L, xy, lower=True)
+
+    solver = Lasso(fit_intercept=False, precompute=gram, max_iter=max_iter, tol=tol, warm_start=True)
+    models = {}
+    for alpha in sorted(set(alphas), reverse=True):
+        solver.alpha = alpha * n / p
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            solver.fit(X_s, y_s)
+
+        model = Lasso(alpha=alpha, max_iter=max_iter, tol=tol)
+        model.coef_ = solver.coef_.copy()
+        model.intercept_ = y_mean - x_mean @ solver.coef_
+        model.n_features_in_ = p
+        model.n_iter_ = solver.n_iter_
+        model.dual_gap_ = solver.dual_gap_ * p / n
+        models[alpha] = model
+    return [models[alpha] for alpha in alphas]
@@ -0,0 +1,244 @@
+# pipeline.py
+import hashlib
+import inspect
+import json
+import os
+import sysconfig
+import types
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import joblib
+from artifact_cache import CACHE_DIR, file_digest
+from instrument import stage as instrument_stage
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=(), sources=(), params=None, outputs=(), cache=True, options=None):
+        """
+        One step of a Pipeline. fn is called as fn(*input results, **params, **options);
+        inputs name upstream stages, sources are files read directly, and
+        outputs are files the stage writes (a cached result only counts if
+        they are still the files it wrote). options are left out of the key, for settings such
+        as n_jobs that change how a result is computed but not what it is.
+        cache=False always recomputes, for results too big to be worth
+        storing; downstream keys are unaffected.
+        """
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.sources = tuple(sources)
+        self.params = dict(params or {})
+        self.options = dict(options or {})
+        self.outputs = tuple(outputs)
+        self.cache = cache
+
+
+_LIBRARY_PATHS = tuple(
+    os.path.realpath(sysconfig.get_paths()[k]) for k in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+)
+
+
+def _is_project_code(obj):
+    try:
+        path = os.path.realpath(inspect.getsourcefile(obj) or '')
+    except TypeError:
+        return False
+    return bool(path) and not path.startswith(_LIBRARY_PATHS)
+
+
+def _referenced_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referenced_names(const)
+    return names
+
+
+def _code_digest(code):
+    """Bytecode, names and constants of a code object (and its nested ones); comments do not count."""
+    h = hashlib.sha256(code.co_code)
+    h.update(repr((code.co_names, code.co_varnames)).encode())
+    for const in code.co_consts:
+        h.update(_code_digest(const).encode() if isinstance(const, types.CodeType) else repr(const).encode())
+    return h.hexdigest()
+
+
+def _code_fingerprint(fn):
+    """
+    Digest of fn's code and of the project functions and classes it
+    references, transitively, so editing a helper a stage calls invalidates
+    its results. Library code (stdlib, site-packages) is not followed.
+    """
+    parts, seen, stack = [], set(), [fn]
+    while stack:
+        obj = inspect.unwrap(stack.pop())
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, type):
+            functions = [getattr(v, '__func__', v) for v in vars(obj).values()]
+        else:
+            functions = [obj]
+        functions = [f for f in functions if isinstance(f, types.FunctionType)]
+        name = f'{getattr(obj, "__module__", "")}.{getattr(obj, "__qualname__", repr(obj))}'
+        parts.append(' '.join(
+            [name] + [_code_digest(f.__code__) + repr((f.__defaults__, f.__kwdefaults__)) for f in functions]
+        ))
+        for f in functions:
+            for ref_name in sorted(_referenced_names(f.__code__)):
+                ref = f.__globals__.get(ref_name)
+                if isinstance(ref, (types.FunctionType, type)) and _is_project_code(ref):
+                    stack.append(ref)
+                elif isinstance(ref, (dict, list, tuple, str, int, float)):
+                    # module-level settings such as vocabularies and lookup tables
+                    parts.append(f'{ref_name}={ref!r}')
+    return parts
+
+
+class Pipeline:
+    """
+    Runs stages in dependency order, independent stages concurrently. A
+    stage's key hashes its code, parameters, source file digests and the
+    digests of its inputs' results, so a run re-executes only what is
+    downstream of a change, and stops early when a re-run stage produces
+    the same result as before. Stages are only executed as far as the
+    targets need them.
+    """
+    def __init__(self, stages, cache_dir: str = os.path.join(CACHE_DIR, 'pipeline'), max_workers: int = 4):
+        self.stages = {}
+        for s in stages:
+            if s.name in self.stages:
+                raise ValueError(f'duplicate stage {s.name!r}')
+            missing = [i for i in s.inputs if i not in self.stages]
+            if missing:
+                raise ValueError(f'stage {s.name!r} depends on undeclared {missing}; declare stages in order')
+            self.stages[s.name] = s
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+
+    def sinks(self):
+        """Stages nothing else depends on; the default targets."""
+        used = {i for s in self.stages.values() for i in s.inputs}
+        return [name for name in self.stages if name not in used]
+
+    def _key(self, name: str, digests) -> str:
+        s = self.stages[name]
+        payload = {
+            'name': name,
+            'code': _code_fingerprint(s.fn),
+            'params': s.params,
+            'sources': [file_digest(path) for path in s.sources],
+            'inputs': [digests[i] for i in s.inputs],
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{name}-{key[:16]}.pkl')
+
+    def _cached_digest(self, name: str, key: str):
+        """Digest of the stored result for (name, key), or None when it has to be recomputed."""
+        path = self._path(name, key)
+        try:
+            with open(path + '.digest') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # another run (say, with other params) may have overwritten the outputs since
+        outputs = self.stages[name].outputs
+        if not all(os.path.exists(o) for o in outputs) \
+                or recorded.get('outputs') != [file_digest(o) for o in outputs]:
+            return None
+        return recorded.get('result') if os.path.exists(path) else None
+
+    def _store(self, name: str, key: str, result) -> str:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(name, key)
+        joblib.dump(result, path + '.tmp')
+        h = hashlib.sha256()
+        with open(path + '.tmp', 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        os.replace(path + '.tmp', path)
+        with open(path + '.digest', 'w') as f:
+            json.dump({'result': h.hexdigest(),
+                       'outputs': [file_digest(o) for o in self.stages[name].outputs]}, f)
+        return h.hexdigest()
+
+    def run(self, targets=None, force=(), verbose=True):
+        """
+        Returns {stage: result} for the targets (default: the sinks) and every
+        stage that had to execute. force re-executes the named stages.
+        """
+        targets = list(targets or self.sinks())
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].inputs)
+        order = [name for name in self.stages if name in needed]
+
+        keys, digests, status, results = {}, {}, {}, {}
+        wanted = set()
+
+        def execute(name, args):
+            s = self.stages[name]
+            with instrument_stage(name):
+                result = s.fn(*args, **s.params, **s.options)
+            digest = self._store(name, keys[name], result) if s.cache else keys[name]
+            return result, digest
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while True:
+                # a stage's key is known once every input has a result digest
+                for name in order:
+                    s = self.stages[name]
+                    if name in status or not all(i in digests for i in s.inputs):
+                        continue
+                    keys[name] = self._key(name, digests)
+                    cached = None if name in force or not s.cache else self._cached_digest(name, keys[name])
+                    if cached is not None:
+                        status[name], digests[name] = 'cached', cached
+                    elif not s.cache:
+                        # recomputed only if something downstream has to run
+                        status[name], digests[name] = 'deferred', keys[name]
+                    else:
+                        status[name] = 'run'
+                        wanted.add(name)
+                    if name in targets and status[name] == 'deferred':
+                        wanted.add(name)
+                    if verbose and status[name] != 'deferred':
+                        print(f'[{status[name]}] {name}')
+
+                # stages that run need their inputs' results: load cached ones, run deferred ones
+                stack = list(wanted)
+                while stack:
+                    for i in self.stages[stack.pop()].inputs:
+                        if status.get(i) == 'deferred' and i not in wanted:
+                            wanted.add(i)
+                            stack.append(i)
+                            if verbose:
+                                print(f'[run] {i}')
+                        elif status.get(i) == 'cached' and i not in results:
+                            results[i] = joblib.load(self._path(i, keys[i]))
+
+                submitted = set(running.values())
+                for name in order:
+                    s = self.stages[name]
+                    if name in wanted and name not in results and name not in submitted \
+                            and all(i in results for i in s.inputs):
+                        running[pool.submit(execute, name, [results[i] for i in s.inputs])] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    # re-raises a failed stage; stages that already finished keep their cache entries
+                    results[name], digests[name] = future.result()
+
+        for name in targets:
+            if name not in results:
+                results[name] = joblib.load(self._path(name, keys[name]))
+        return results
@@ -1,33 +1,81 @@
+import argparse
+import os
+import sys
+import numpy as np
 import pandas as pd
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 
-# Load your dataset
-df = pd.read_csv('std_df.csv')
+# running_stats lives in the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from running_stats import RunningStats, csv_numeric_columns  # noqa: E402
 
-# Separate features and target
-X = df.drop(columns='COVID Deaths')  # Replace 'y' with the actual name of your target column
-y = df['COVID Deaths']
+TARGET = 'COVID Deaths'
 
-# Keep only numeric features for PCA
-X = X.select_dtypes(include=['float64', 'int64'])
 
-# Standardize the feature data
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+def numeric_features(df):
+    """Numeric feature columns of df (the target excluded)."""
+    X = df.drop(columns=TARGET, errors='ignore')
+    return list(X.select_dtypes(include=['float64', 'int64']).columns)
 
-# Perform PCA
-pca = PCA(n_components=3)
-principal_components = pca.fit_transform(X_scaled)
 
-# Explained variance ratios
-print("Explained variance ratios:", pca.explained_variance_ratio_)
+def pca_in_memory(path='std_df.csv', n_components=3):
+    """Loads the whole frame and runs a full PCA; returns (explained variance ratios, loadings)."""
+    # Load your dataset
+    df = pd.read_csv(path)
 
-# Get the loadings (principal component directions)
-loadings = pd.DataFrame(pca.components_, columns=X.columns, index=[f'PC{i+1}' for i in range(3)])
+    # Keep only numeric features for PCA
+    X = df[numeric_features(df)]
 
-# For each component, sort features by absolute value of loading
-for pc in loadings.index:
-    sorted_loadings = loadings.loc[pc].abs().sort_values(ascending=False)
-    print(f"\nTop features contributing to {pc}:")
-    print(sorted_loadings)
\ No newline at end of file
+    # Standardize the feature data
+    X_scaled = StandardScaler().fit_transform(X)
+
+    # Perform PCA
+    pca = PCA(n_components=n_components).fit(X_scaled)
+    loadings = pd.DataFrame(pca.components_, columns=X.columns, index=[f'PC{i+1}' for i in range(n_components)])
+    return pca.explained_variance_ratio_, loadings
+
+
+def pca_streaming(path='std_df.csv', n_components=3, chunksize=50_000):
+    """
+    pca_in_memory without loading the frame: a pass over chunks finds the
+    numeric columns, a second accumulates their means and covariances
+    (RunningStats), and the components come from the standardized covariance
+    matrix. Memory depends on chunksize and the
+    feature count, not the row count.
+    """
+    # the feature columns are typed over the whole file, not its first chunk
+    columns = [c for c in csv_numeric_columns(path, chunksize, include=('float64', 'int64')) if c != TARGET]
+    stats = RunningStats.from_csv(path, columns, chunksize=chunksize, dtype=np.float64)
+    ratios, components = stats.pca(n_components)
+    loadings = pd.DataFrame(components, columns=columns, index=[f'PC{i+1}' for i in range(n_components)])
+    return ratios, loadings
+
+
+def report(explained_variance_ratio, loadings):
+    # Explained variance ratios
+    print("Explained variance ratios:", explained_variance_ratio)
+
+    # For each component, sort features by absolute value of loading
+    for pc in loadings.index:
+        sorted_loadings = loadings.loc[pc].abs().sort_values(ascending=False)
+        print(f"\nTop features contributing to {pc}:")
+        print(sorted_loadings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PCA of the standardized frame')
+    parser.add_argument('path', nargs='?', default='std_df.csv')
+    parser.add_argument('-n', '--components', type=int, default=3)
+    parser.add_argument('--stream', action='store_true', help='read the frame in chunks (memory independent of rows)')
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    if args.stream:
+        report(*pca_streaming(args.path, args.components, args.chunksize))
+    else:
+        report(*pca_in_memory(args.path, args.components))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,16 @@
+import os
+import sys
 from model import Model
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+from c import (COVID_CSV, POLITICAL_CSV, POPULATION_CSV, analyze_covid_deaths, analyze_hhs_regions,
+               analyze_political_control, merge_pop)
+
+# pipeline/instrument live in the repository root; appended so this folder's model_utils wins
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import Pipeline, Stage  # noqa: E402
+from instrument import run  # noqa: E402
 
-df = pd.read_csv('death_results.csv')
 age_map = {
         '0-4 years': 2,
         '5-11 years': 8,
@@ -15,36 +23,97 @@ age_map = {
         '75 years and over': 80  # Assumed average; you can adjust as needed
     }
 
-# Map age group
-df['Age Group'] = df['Age Group'].map(age_map)
 
-df['Region'] = df['Region'].astype(str)
-# One-hot encode 'Race'
-encoded = pd.get_dummies(df[['Race', 'Region']], drop_first=True)
+def political(path="political_results.csv"):
+    political_results = analyze_political_control()
+    political_results.to_csv(path, index=False)
+    return political_results
+
+
+def merge(covid_results, hhs_results, political_results, path="death_results.csv"):
+    death_results = merge_pop(covid_results, hhs_results, political_results)
+    death_results.to_csv(path, index=False)
+    return death_results
+
+
+def load_merged(path="death_results.csv"):
+    return pd.read_csv(path)
+
+
+def scale(df, path="std_df.csv"):
+    """Maps age groups to midpoints, one-hot encodes race and region, standardizes everything but Year."""
+    df = df.copy()
+
+    # Map age group
+    df['Age Group'] = df['Age Group'].map(age_map)
+
+    df['Region'] = df['Region'].astype(str)
+    # One-hot encode 'Race'
+    encoded = pd.get_dummies(df[['Race', 'Region']], drop_first=True)
+
+    # Drop unused columns
+    df = df.drop(columns=['Race', 'Region'])
+
+    # Combine with one-hot encoded race columns
+    std_df = pd.concat([df, encoded], axis=1)
+
+    # Separate 'Year' before scaling
+    year_col = std_df['Year'] - 2020
+    features_to_scale = std_df.drop(columns=['Year'])
+
+    # Scale only the other columns
+    scaler = StandardScaler()
+    scaled_features = pd.DataFrame(scaler.fit_transform(features_to_scale), columns=features_to_scale.columns)
+
+    # Add 'Year' back
+    std_df_scaled = pd.concat([year_col.reset_index(drop=True), scaled_features], axis=1)
+
+    # Save to CSV
+    std_df_scaled.to_csv(path, index=False)
+    return std_df_scaled
+
 
-# Drop unused columns
-df = df.drop(columns=['Race', 'Region'])
+def train(std_df):
+    # Model reads std_df.csv itself; std_df is the dependency that keys this stage
+    return Model(True)
 
-# Combine with one-hot encoded race columns
-std_df = pd.concat([df, encoded], axis=1)
 
-# Separate 'Year' before scaling
-year_col = std_df['Year'] - 2020
-features_to_scale = std_df.drop(columns=['Year'])
+def evaluate(model):
+    return pd.DataFrame(model.test_models(), columns=['mse', 'r2']).rename_axis('window')
 
-# Scale only the other columns
-scaler = StandardScaler()
-scaled_features = pd.DataFrame(scaler.fit_transform(features_to_scale), columns=features_to_scale.columns)
 
-# Add 'Year' back
-std_df_scaled = pd.concat([year_col.reset_index(drop=True), scaled_features], axis=1)
+def report(model, directory='coefficient_plots'):
+    # Stages run on worker threads, where pyplot windows must not be opened.
+    # The file names come from the trained features, so the stage's declared
+    # output is their directory: deleting any PNG makes the next run redraw them
+    for feature in model.poly_feature_names:
+        model.save_feature(feature, directory)
+    return list(model.poly_feature_names)
 
-# Save to CSV
-std_df_scaled.to_csv("std_df.csv", index=False)
 
+def build_pipeline():
+    """covid | population | political -> merge -> scale -> train -> evaluate | report"""
+    if os.path.exists(COVID_CSV):
+        ingest = [
+            Stage('covid', analyze_covid_deaths, sources=[COVID_CSV]),
+            Stage('population', analyze_hhs_regions, sources=[POPULATION_CSV]),
+            Stage('political', political, sources=[POLITICAL_CSV], outputs=['political_results.csv']),
+            Stage('merge', merge, inputs=['covid', 'population', 'political'], outputs=['death_results.csv']),
+        ]
+    else:
+        # without the raw CDC export, start from the last merged death_results.csv
+        ingest = [Stage('merge', load_merged, sources=['death_results.csv'])]
+    return Pipeline(ingest + [
+        Stage('scale', scale, inputs=['merge'], outputs=['std_df.csv']),
+        Stage('train', train, inputs=['scale']),
+        Stage('evaluate', evaluate, inputs=['train']),
+        Stage('report', report, inputs=['train'], params={'directory': 'coefficient_plots'},
+              outputs=['coefficient_plots']),
+    ])
 
-model = Model(True)
-model.test_models()
 
-for feature in model.poly_feature_names:
-    model.graph_feature(feature)
\ No newline at end of file
+if __name__ == '__main__':
+    # python main.py [run_report.json]: per-stage timings and memory only when a report path is given
+    with run(sys.argv[1] if len(sys.argv) > 1 else None):
+        results = build_pipeline().run()
+    print(results['evaluate'])
@@ -1,8 +1,8 @@
 from model_utils import Model_utils
-import matplotlib.pyplot as plt
 import pandas as pd
 import joblib
 import numpy as np
+import os
 
 
 class Model:
@@ -25,11 +25,14 @@ class Model:
             ]
     
     def test_models(self):
-        """Load models with timestamps from pickle files"""
-        for i in range(len(self.models)):
+        """Evaluates every window's model on its test rows; returns [(mse, r2), ...]."""
+        return [
             Model_utils.evaluate(self.models[i],self.windows[i][1], self.windows[i][3])
+            for i in range(len(self.models))
+        ]
 
-    def graph_feature(self, feature_name):
+    def feature_coefficients(self, feature_name):
+        """Coefficient of feature_name in every window's model (NaN where it is missing)."""
         coefficients = []
 
         for model in self.models:
@@ -44,16 +47,40 @@ class Model:
             else:
                 coef = model.coef_.flatten()[feature_index[0]]
                 coefficients.append(coef)
+        return coefficients
+
+    @staticmethod
+    def _draw_coefficients(ax, coefficients, feature_name):
+        ax.plot(range(len(coefficients)), coefficients,
+                marker='o', linestyle='--', color='tab:blue')
+        ax.set_title(f'Coefficient Evolution: {feature_name}', pad=20)
+        ax.set_xlabel('Time Window Index', labelpad=15)
+        ax.set_ylabel('Coefficient Value', labelpad=15)
+        ax.grid(True, alpha=0.3)
+
+    def graph_feature(self, feature_name):
+        import matplotlib.pyplot as plt
 
         # Plot
         plt.figure(figsize=(10, 6))
-        plt.plot(range(len(coefficients)), coefficients, 
-                marker='o', linestyle='--', color='tab:blue')
-        plt.title(f'Coefficient Evolution: {feature_name}', pad=20)
-        plt.xlabel('Time Window Index', labelpad=15)
-        plt.ylabel('Coefficient Value', labelpad=15)
-        plt.grid(True, alpha=0.3)
+        self._draw_coefficients(plt.gca(), self.feature_coefficients(feature_name), feature_name)
         plt.tight_layout()
         plt.show()
         plt.savefig(f'Coefficient_Evolution_{feature_name}.png')  # Save the plot with a dynamic filename
         plt.close()
+
+    def save_feature(self, feature_name, directory='.'):
+        """
+        graph_feature without a window: draws on a Figure that pyplot never
+        sees, so it is safe off the main thread (pipeline stages run in a pool).
+        Returns the PNG's path.
+        """
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 6))
+        self._draw_coefficients(fig.subplots(), self.feature_coefficients(feature_name), feature_name)
+        fig.tight_layout()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'Coefficient_Evolution_{feature_name}.png')
+        fig.savefig(path)
+        return path
@@ -0,0 +1,122 @@
+# regions.py
+"""
+The HHS region dimension shared by clean.py, projectv2/c.py and
+Ethan_code/c.py: the state -> region map as arrays, and vectorized roll-ups
+of state-level populations, deaths and political control to regions.
+Deaths also accept the CDC's own "Region N" rows.
+"""
+import numpy as np
+import pandas as pd
+
+# Define HHS regions globally
+hhs_regions = {
+        '1': ['Connecticut', 'Maine', 'Massachusetts', 'New Hampshire', 'Rhode Island', 'Vermont'],
+        '2': ['New Jersey', 'New York'],
+        '3': ['Delaware', 'District of Columbia', 'Maryland', 'Pennsylvania', 'Virginia', 'West Virginia'],
+        '4': ['Alabama', 'Florida', 'Georgia', 'Kentucky', 'Mississippi', 'North Carolina', 'South Carolina', 'Tennessee'],
+        '5': ['Illinois', 'Indiana', 'Michigan', 'Minnesota', 'Ohio', 'Wisconsin'],
+        '6': ['Arkansas', 'Louisiana', 'New Mexico', 'Oklahoma', 'Texas'],
+        '7': ['Iowa', 'Kansas', 'Missouri', 'Nebraska'],
+        '8': ['Colorado', 'Montana', 'North Dakota', 'South Dakota', 'Utah', 'Wyoming'],
+        '9': ['Arizona', 'California', 'Hawaii', 'Nevada'],
+        '10': ['Alaska', 'Idaho', 'Oregon', 'Washington']
+}
+
+REGIONS = np.array([int(region) for region in hhs_regions], dtype=np.int8)
+REGION_LABELS = [f'Region {region}' for region in REGIONS]
+STATES = np.array([state for states in hhs_regions.values() for state in states])
+STATE_REGION = np.concatenate([np.full(len(states), int(region), dtype=np.int8)
+                               for region, states in hhs_regions.items()])
+
+# Lookup tables with a trailing 0 so get_indexer's -1 (not found) lands on "no region"
+_STATES = pd.Index(STATES)
+_STATE_REGION = np.append(STATE_REGION, np.int8(0))
+_JURISDICTIONS = pd.Index(np.concatenate([STATES, REGION_LABELS]))
+_JURISDICTION_REGION = np.concatenate([STATE_REGION, REGIONS, [0]]).astype(np.int8)
+
+# Population estimate column per year; 2025 uses the 2020 base estimate
+POPULATION_COLUMNS = {2020: 'POPESTIMATE2020', 2021: 'POPESTIMATE2021', 2022: 'POPESTIMATE2022',
+                      2023: 'POPESTIMATE2023', 2024: 'POPESTIMATE2024', 2025: 'ESTIMATESBASE2020'}
+
+
+def state_region(states):
+    """Region number (int8) of every state name in states; 0 for anything else."""
+    return _STATE_REGION[_STATES.get_indexer(pd.Index(states))]
+
+
+def region_of(names):
+    """Like state_region, but the CDC's "Region N" labels resolve to N as well."""
+    return _JURISDICTION_REGION[_JURISDICTIONS.get_indexer(pd.Index(names))]
+
+
+def roll_up(df, values, keys=('Year',), state='State'):
+    """Sums the values columns of state-level rows per keys and region; rows outside every region are dropped."""
+    region = pd.Series(state_region(df[state]), index=df.index, name='Region')
+    mask = region.to_numpy() > 0
+    group_keys = [df.loc[mask, k] for k in keys] + [region[mask].astype(int)]
+    return df.loc[mask, list(values)].groupby(group_keys).sum().reset_index()
+
+
+def population_by_state(pop_df, years=POPULATION_COLUMNS):
+    """(State, Year, Population) of the state rows (SUMLEV 040) of a Census NST-EST file, one row per year."""
+    states = pop_df[pop_df['SUMLEV'].astype(str).str.zfill(3) == '040']
+    columns = {POPULATION_COLUMNS.get(year, f'POPESTIMATE{year}'): year for year in years}
+    melted = states.melt(id_vars='NAME', value_vars=list(columns), var_name='Year', value_name='Population')
+    melted['Year'] = melted['Year'].map(columns)
+    melted['Population'] = pd.to_numeric(melted['Population'], errors='coerce')
+    return melted.rename(columns={'NAME': 'State'})
+
+
+def population_by_region(pop_df, years=POPULATION_COLUMNS):
+    """Total population per (Region, Year)"""
+    population = roll_up(population_by_state(pop_df, years), ['Population'])
+    return population[['Region', 'Year', 'Population']].sort_values(['Region', 'Year']).reset_index(drop=True)
+
+
+def deaths_by_state(covid_df, group='Sex'):
+    """(Year, State, Deaths) summed over the CDC rows of one demographic group; unusable counts count as 0."""
+    rows = covid_df[covid_df['group'] == group]
+    deaths = pd.to_numeric(rows['COVID_deaths'], errors='coerce').fillna(0).groupby(
+        [pd.to_numeric(rows['year'], errors='coerce'), rows['jurisdiction_residence']]
+    ).sum()
+    deaths.index.names = ['Year', 'State']
+    return deaths.rename('Deaths').reset_index()
+
+
+def deaths_by_region(covid_df, group='Sex'):
+    """
+    Deaths per (Year, Region) of one demographic group: the sum of the
+    region's state rows, or the CDC's own "Region N" rows where the file has
+    no state rows for that year and region (the provisional-deaths export
+    only reports the nation and the regions).
+    """
+    deaths = deaths_by_state(covid_df, group)
+    region = region_of(deaths['State'])
+    mask = region > 0
+    deaths = deaths[mask].assign(Region=region[mask].astype(int),
+                                 from_states=state_region(deaths.loc[mask, 'State']) > 0)
+    sums = deaths.groupby(['Year', 'Region', 'from_states'])['Deaths'].sum().reset_index()
+    # state rows take precedence, so a file with both is not counted twice
+    sums = sums.sort_values('from_states').drop_duplicates(['Year', 'Region'], keep='last')
+    return sums[['Year', 'Region', 'Deaths']].sort_values(['Year', 'Region']).reset_index(drop=True)
+
+
+def political_control_shares(political_df, keys=('Year',)):
+    """Percent of states in each HHS region under each kind of control, per `keys` group"""
+    region = state_region(political_df['State'])
+    df = political_df[region > 0].assign(Region=region[region > 0].astype(int))
+
+    # 2 = Republican, 1 = Democrat, anything else = Mixed (governors have no mixed share)
+    indicators = pd.DataFrame({
+        'Legislature Republican %': df['Legislature_Control'] == 2,
+        'Legislature Democrat %': df['Legislature_Control'] == 1,
+        'Legislature Mixed %': ~df['Legislature_Control'].isin([1, 2]),
+        'Governor Republican %': df['Governor_Control'] == 2,
+        'Governor Democrat %': df['Governor_Control'] == 1,
+        'State Control Republican %': df['State_Control'] == 2,
+        'State Control Democrat %': df['State_Control'] == 1,
+        'State Control Mixed %': ~df['State_Control'].isin([1, 2]),
+    })
+    group_keys = [df[k] for k in keys] + [df['Region']]
+    shares = (indicators.groupby(group_keys).mean() * 100).reset_index()
+    return shares.sort_values(list(keys) + ['Region']).reset_index(drop=True)
@@ -0,0 +1,159 @@
+# running_stats.py
+"""
+Single-pass, mergeable means, variances, covariances and correlations.
+
+Statistics are kept per column pair over the rows where both columns are
+present, like DataFrame.corr/cov, so NaNs are handled the way pandas handles
+them. Each chunk is centred before its sums are taken, and chunks are combined
+with the parallel update of Chan et al., so results stay accurate over many
+chunks. Accumulators built in separate processes can be merged:
+
+    stats = RunningStats.from_csv('std_df.csv', chunksize=100_000)
+    stats.corr()                  # == pd.read_csv('std_df.csv').corr(numeric_only=True)
+    mean, scale = stats.scaler_params()
+"""
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    def __init__(self, columns):
+        """Empty accumulator over columns; feed it with update() or merge()."""
+        self.columns = list(columns)
+        p = len(self.columns)
+        # [i, j]: statistics of column i over the rows where columns i and j are both present
+        self.n = np.zeros((p, p))
+        self.mean = np.zeros((p, p))
+        self.m2 = np.zeros((p, p))
+        self.comoment = np.zeros((p, p))     # symmetric; sum of (x_i - mean) * (x_j - mean)
+
+    def update(self, X):
+        """Adds a chunk: a (rows x columns) array, or a frame holding the columns."""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.columns]
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return self
+        present = np.isfinite(X)
+        W = present.astype(np.float64)
+        # centre on the chunk's own column means so the sums below do not cancel
+        shift = np.zeros(X.shape[1])
+        counts = present.sum(axis=0)
+        np.divide(np.where(present, X, 0).sum(axis=0), counts, out=shift, where=counts > 0)
+        Z = np.where(present, X - shift, 0.0)
+
+        chunk = RunningStats.__new__(RunningStats)
+        chunk.columns = self.columns
+        chunk.n = W.T @ W
+        sums = Z.T @ W
+        mean = np.divide(sums, chunk.n, out=np.zeros_like(sums), where=chunk.n > 0)
+        chunk.mean = mean + shift[:, None]
+        chunk.m2 = (Z * Z).T @ W - sums * mean
+        chunk.comoment = Z.T @ Z - sums * mean.T
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Folds another accumulator over the same columns into this one (Chan's pairwise update)."""
+        if other.columns != self.columns:
+            raise ValueError("cannot merge RunningStats over different columns")
+        n = self.n + other.n
+        weight = np.divide(other.n, n, out=np.zeros_like(n), where=n > 0)
+        delta = other.mean - self.mean
+        cross = self.n * weight            # n_a * n_b / n
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta * delta * cross
+        self.comoment = self.comoment + other.comoment + delta * delta.T * cross
+        self.n = n
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, columns=None):
+        """Accumulates an iterable of frames (columns default to the first one's numeric columns)."""
+        stats = None
+        for chunk in chunks:
+            if stats is None:
+                stats = cls(columns if columns is not None else numeric_columns(chunk))
+            stats.update(chunk)
+        if stats is None:
+            raise ValueError("no chunks to accumulate")
+        return stats
+
+    @classmethod
+    def from_csv(cls, path, columns=None, chunksize=100_000, rows=None, **read_csv_kwargs):
+        """
+        Statistics of a CSV read chunksize rows at a time. columns default to
+        csv_numeric_columns (an extra pass over the file); rows, if given,
+        maps each chunk to the rows to accumulate (e.g. dropping incomplete ones).
+        """
+        if columns is None:
+            columns = csv_numeric_columns(path, chunksize, **read_csv_kwargs)
+        reader = pd.read_csv(path, usecols=columns, chunksize=chunksize, **read_csv_kwargs)
+        return cls.from_chunks(reader if rows is None else map(rows, reader), columns)
+
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def count(self):
+        return pd.Series(np.diag(self.n), index=self.columns)
+
+    def means(self):
+        return pd.Series(np.diag(self.mean), index=self.columns)
+
+    def var(self, ddof=1):
+        n = np.diag(self.n)
+        return pd.Series(np.diag(self.m2) / np.where(n > ddof, n - ddof, np.nan), index=self.columns)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def cov(self, ddof=1):
+        """Pairwise covariance matrix, as DataFrame.cov(ddof=ddof)."""
+        return self._frame(self.comoment / np.where(self.n > ddof, self.n - ddof, np.nan))
+
+    def corr(self):
+        """Pairwise Pearson correlation matrix, as DataFrame.corr(numeric_only=True)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        corr[self.n < 2] = np.nan
+        return self._frame(np.clip(corr, -1, 1))
+
+    def scaler_params(self):
+        """(mean, scale) per column, as a fitted StandardScaler's mean_ and scale_."""
+        scale = np.sqrt(self.var(ddof=0).to_numpy())
+        scale[~(scale > 10 * np.finfo(np.float64).eps * np.abs(self.means().to_numpy()))] = 1.0
+        return self.means().to_numpy(), scale
+
+    def pca(self, n_components=None):
+        """
+        (explained variance ratios, components) of a PCA of the standardized
+        columns, as StandardScaler followed by PCA; component signs are arbitrary.
+        """
+        _, scale = self.scaler_params()
+        cov = self.cov().to_numpy() / np.outer(scale, scale)
+        eigvals, eigvecs = np.linalg.eigh(cov)
+        order = np.argsort(eigvals)[::-1][:n_components]
+        ratios = eigvals[order] / eigvals.sum()
+        return ratios, eigvecs[:, order].T
+
+
+def numeric_columns(df):
+    """The columns DataFrame.corr(numeric_only=True) would use."""
+    return list(df.select_dtypes(include=['number', 'bool']).columns)
+
+
+def csv_numeric_columns(path, chunksize=100_000, include=('number', 'bool'), **read_csv_kwargs):
+    """
+    The columns of a CSV whose dtype is in include in every chunk they have
+    values in, found in one pass. Unlike numeric_columns of the first chunk,
+    a column that is empty there or turns to text further down is classified
+    by the whole file, as pd.read_csv(path) would.
+    """
+    columns, numeric = [], {}
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        if not columns:
+            columns = list(chunk.columns)
+        kinds = set(chunk.select_dtypes(include=list(include)).columns)
+        for name in chunk.columns[chunk.notna().any()]:
+            numeric[name] = numeric.get(name, True) and name in kinds
+    # a column with no values anywhere reads as float64 NaN
+    return [name for name in columns if numeric.get(name, True)]
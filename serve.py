@@ -0,0 +1,228 @@
+# serve.py
+"""
+Local prediction server. Keeps every window model hot in memory, gathers
+concurrent requests into micro-batches scored in one matrix multiply (the
+way Model_utils.predict_all does, with NumPy alone, so sklearn is never
+imported), and caches predictions for feature rows it has already seen.
+
+    python serve.py --port 5000
+
+POST /predict  {"rows": [{"time": 40, "age": 57, ...}, ...]}
+               -> {"predictions": [[window 0, window 1, ...], ...]}
+GET  /stats    latency, throughput and cache counters
+"""
+import argparse
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify, request
+from model_bundle import ModelBundle, poly2_expand, poly2_names, stack_models
+
+
+class _Pending:
+    """Rows of one request waiting for the batcher."""
+    def __init__(self, keys):
+        self.keys = keys
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class PredictionService:
+    def __init__(
+        self,
+        models,
+        input_features,
+        x_scaler=None,
+        y_scaler=None,
+        max_batch_rows: int = 4096,
+        max_wait: float = 0.005,
+        cache_size: int = 100_000
+    ):
+        """
+        models is a ModelBundle or a list of fitted window models, trained on the
+        degree-2 expansion of input_features: the encoded columns, in training
+        order. The scalers are fitted StandardScalers, or None for unscaled data.
+        """
+        self.models = models
+        self.input_features = list(input_features)
+        self.x_scaler = x_scaler
+        self.y_scaler = y_scaler
+        self.coef, self.intercept = stack_models(models)
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+
+        self.started = time.time()
+        self.counters = {'requests': 0, 'rows': 0, 'cache_hits': 0, 'batches': 0, 'batched_rows': 0}
+        self._latencies = deque(maxlen=10_000)
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def predict(self, rows):
+        """(rows x windows) predictions for a list of feature dicts."""
+        start = time.perf_counter()
+        keys = [tuple(float(row[name]) for name in self.input_features) for row in rows]
+        if not keys:
+            return np.empty((0, len(self.models)))
+
+        out = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    out[i] = cached
+            self.counters['cache_hits'] += len(keys) - len(missing)
+
+        if missing:
+            pending = _Pending([keys[i] for i in missing])
+            self._queue.put(pending)
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            for i, values in zip(missing, pending.result):
+                out[i] = values
+
+        with self._lock:
+            self.counters['requests'] += 1
+            self.counters['rows'] += len(keys)
+            self._latencies.append(time.perf_counter() - start)
+        return np.array(out).reshape(len(keys), -1)
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            n_rows = len(batch[0].keys)
+            deadline = time.perf_counter() + self.max_wait
+            # Keep collecting until the batch is full or the wait window closes
+            while n_rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                n_rows += len(pending.keys)
+            self._score(batch)
+
+    def _score(self, batch):
+        keys = [key for pending in batch for key in pending.keys]
+        try:
+            X = np.array(keys, dtype=np.float64)
+            if self.x_scaler is not None:
+                X = self.x_scaler.transform(pd.DataFrame(X, columns=self.input_features))
+            preds = poly2_expand(X) @ self.coef.T + self.intercept
+            if self.y_scaler is not None:
+                # the target scaler is fitted on one column; undo it on every window's column
+                preds = self.y_scaler.inverse_transform(preds.reshape(-1, 1)).reshape(preds.shape)
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+
+        with self._lock:
+            self.counters['batches'] += 1
+            self.counters['batched_rows'] += len(keys)
+            for key, values in zip(keys, preds):
+                # a row view would keep the whole batch's array alive for as long as the entry lives
+                self._cache[key] = values.copy()
+                self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        offset = 0
+        for pending in batch:
+            pending.result = preds[offset:offset + len(pending.keys)]
+            offset += len(pending.keys)
+            pending.done.set()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            latencies = np.array(self._latencies)
+            cache_entries = len(self._cache)
+        elapsed = time.time() - self.started
+        stats = {
+            **counters,
+            'cache_entries': cache_entries,
+            'uptime_s': elapsed,
+            'requests_per_s': counters['requests'] / elapsed if elapsed else 0.0,
+            'rows_per_s': counters['rows'] / elapsed if elapsed else 0.0,
+            'mean_batch_rows': counters['batched_rows'] / counters['batches'] if counters['batches'] else 0.0,
+        }
+        if len(latencies):
+            stats.update({
+                'latency_mean_ms': float(latencies.mean() * 1000),
+                'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+                'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+                'latency_max_ms': float(latencies.max() * 1000),
+            })
+        return stats
+
+
+def create_app(service: PredictionService) -> Flask:
+    app = Flask(__name__)
+
+    @app.post('/predict')
+    def predict():
+        payload = request.get_json(force=True)
+        rows = payload.get('rows') if isinstance(payload, dict) else None
+        if not isinstance(rows, list):
+            return jsonify({'error': "expected a JSON object with a 'rows' list"}), 400
+        try:
+            preds = service.predict(rows)
+        except KeyError as e:
+            return jsonify({'error': f'missing feature {e.args[0]!r}'}), 400
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'predictions': preds.tolist()})
+
+    @app.get('/stats')
+    def stats():
+        return jsonify(service.stats())
+
+    @app.get('/health')
+    def health():
+        return jsonify({'status': 'ok', 'windows': len(service.models)})
+
+    return app
+
+
+def load_service(bundle_path: str = 'models/model_bundle.bin', **kwargs) -> PredictionService:
+    """Service over a trained model bundle (see Model(train=True))."""
+    bundle = ModelBundle(bundle_path)
+    input_features = bundle.metadata.get('input_features')
+    if input_features is None:
+        # bundles written before input_features was recorded
+        from model_utils import Model_utils
+        input_features = Model_utils.load_data('df_encoded.csv').columns.drop('crude_COVID_rate')
+    if poly2_names(list(input_features)) != list(bundle.feature_names):
+        raise ValueError(f"{bundle_path} was not trained on a degree-2 expansion of its input features")
+    return PredictionService(bundle, input_features, **kwargs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--bundle', default='models/model_bundle.bin')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--max-batch-rows', type=int, default=4096)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    service = load_service(args.bundle, max_batch_rows=args.max_batch_rows, max_wait=args.max_wait_ms / 1000)
+    create_app(service).run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,203 @@
+# sweep.py
+"""
+Hyperparameter sweep over (degree, window_size, stride, alpha) with
+forward-chaining validation: a fold trains on window_size consecutive months
+and is scored on the months right after it, so every configuration is only
+judged on data from its own future.
+
+    python sweep.py --degrees 1 2 --window-sizes 2 3 6 --strides 1 2 --alphas 0.01 0.1 1
+    sqlite3 sweep.db "select * from results where run_id = '...' and window_size = 3 and stride = 1 order by mean_mse"
+
+The design matrix is expanded once per degree and every fold is a row slice
+of it. A fold's X^T X is formed once and the whole alpha list is solved as a
+warm-started path from it (see lasso_path_from_stats). Folds run in parallel
+threads, one round of folds at a time; after min_folds rounds, candidates whose
+mean validation MSE is more than prune_ratio times the best are dropped.
+
+Candidates with different window sizes or strides are scored on different
+validation months and fold counts, so their MSEs are not comparable: pruning
+and ranking only ever compare candidates within one (window_size, stride),
+where every degree and alpha is scored on the same folds.
+"""
+import itertools
+import sqlite3
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from model_utils import Model_utils, design_stats, lasso_path_from_stats
+
+DEFAULT_DB = 'sweep.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folds (
+    run_id TEXT, degree INTEGER, window_size INTEGER, stride INTEGER, alpha REAL,
+    fold INTEGER, first_month INTEGER, val_month INTEGER, train_rows INTEGER, val_rows INTEGER,
+    mse REAL, nonzero INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT, degree INTEGER, window_size INTEGER, stride INTEGER, alpha REAL,
+    folds INTEGER, mean_mse REAL, std_mse REAL, mean_nonzero REAL, pruned_after INTEGER,
+    created TEXT
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, mean_mse);
+"""
+
+
+def forward_folds(n_months: int, window_size: int, stride: int, horizon: int = 1):
+    """(first training month, first validation month) of every fold, in time order."""
+    last_start = n_months - window_size - horizon
+    return [(start, start + window_size) for start in range(0, last_start + 1, stride)]
+
+
+def fit_fold(X, y, month_bounds, first_month, val_month, window_size, horizon, alphas, max_iter, tol):
+    """Validation MSE and non-zero count at every alpha for one fold."""
+    start, stop = month_bounds[first_month][0], month_bounds[first_month + window_size - 1][1]
+    val_start, val_stop = month_bounds[val_month][0], month_bounds[val_month + horizon - 1][1]
+
+    models = lasso_path_from_stats(*design_stats(X[start:stop], y[start:stop]), alphas, max_iter=max_iter, tol=tol)
+    coef = np.vstack([m.coef_ for m in models])
+    intercept = np.array([m.intercept_ for m in models])
+
+    residuals = np.asarray(X[val_start:val_stop] @ coef.T) + intercept - y[val_start:val_stop, None]
+    mse = (residuals ** 2).mean(axis=0)
+    return {
+        'mse': mse,
+        'nonzero': (coef != 0).sum(axis=1),
+        'train_rows': stop - start,
+        'val_rows': val_stop - val_start,
+    }
+
+
+def run_sweep(
+    df: pd.DataFrame,
+    degrees=(2,),
+    window_sizes=(2,),
+    strides=(1,),
+    alphas=(0.1,),
+    horizon: int = 1,
+    n_jobs: int = 1,
+    min_folds: int = 3,
+    prune_ratio: float = 1.5,
+    sparse: bool = True,
+    max_iter: int = 10_000,
+    tol: float = 1e-4,
+    db_path: str = DEFAULT_DB,
+    run_id: str = None
+):
+    """
+    Sweeps every (degree, window_size, stride, alpha) over df (the encoded
+    frame) and writes per-fold scores and per-candidate summaries to the
+    SQLite tables folds/results under run_id. Returns the results sorted by
+    (window_size, stride), then mean validation MSE within each. Pruning also
+    stays within a (window_size, stride); prune_ratio=None disables it. The CSR design
+    (sparse=True) gives the same scores and forms fold Gram matrices far faster.
+    """
+    run_id = run_id or time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+    alphas = sorted(set(alphas), reverse=True)
+
+    # One expansion per degree, shared by every window size, stride and alpha
+    designs = {}
+    for degree in degrees:
+        windows, _ = Model_utils.preprocess(df, 1, sparse=sparse, degree=degree)
+        designs[degree] = (windows.X, windows.y.to_numpy(dtype=np.float64), windows.month_bounds)
+
+    configs = {}
+    for degree, window_size, stride in itertools.product(degrees, window_sizes, strides):
+        folds = forward_folds(len(designs[degree][2]), window_size, stride, horizon)
+        if folds:
+            configs[(degree, window_size, stride)] = {'folds': folds, 'alphas': list(alphas)}
+        else:
+            print(f"degree={degree} window_size={window_size} stride={stride}: not enough months, skipped")
+
+    scores = {}          # (degree, window_size, stride, alpha) -> list of fold MSEs
+    nonzero = {}
+    pruned_after = {}
+    fold_rows = []
+    with Parallel(n_jobs=n_jobs, prefer='threads') as parallel:
+        for k in itertools.count():
+            tasks = [(key, cfg) for key, cfg in configs.items() if cfg['alphas'] and k < len(cfg['folds'])]
+            if not tasks:
+                break
+            outs = parallel(
+                delayed(fit_fold)(
+                    *designs[key[0]], *cfg['folds'][k], key[1], horizon, cfg['alphas'], max_iter, tol
+                )
+                for key, cfg in tasks
+            )
+            for (key, cfg), out in zip(tasks, outs):
+                first_month, val_month = cfg['folds'][k]
+                for alpha, mse, nz in zip(cfg['alphas'], out['mse'], out['nonzero']):
+                    scores.setdefault(key + (alpha,), []).append(float(mse))
+                    nonzero.setdefault(key + (alpha,), []).append(int(nz))
+                    fold_rows.append((run_id, *key, alpha, k, first_month, val_month,
+                                      out['train_rows'], out['val_rows'], float(mse), int(nz)))
+
+            if prune_ratio is not None and k + 1 >= min_folds:
+                # a (window_size, stride) group shares its folds across degrees and alphas
+                groups = {}
+                for key, cfg in configs.items():
+                    for a in cfg['alphas']:
+                        if key + (a,) in scores:
+                            groups.setdefault(key[1:], {})[key + (a,)] = np.mean(scores[key + (a,)])
+                for means in groups.values():
+                    best = min(means.values())
+                    for c, mean in means.items():
+                        if mean > best * prune_ratio:
+                            configs[c[:3]]['alphas'].remove(c[3])
+                            pruned_after[c] = k + 1
+            print(f"round {k + 1}: {len(tasks)} fold fits, "
+                  f"{sum(len(cfg['alphas']) for cfg in configs.values())} candidates left")
+
+    created = time.strftime('%Y-%m-%dT%H:%M:%S')
+    results = pd.DataFrame([
+        {
+            'run_id': run_id, 'degree': c[0], 'window_size': c[1], 'stride': c[2], 'alpha': c[3],
+            'folds': len(mses), 'mean_mse': float(np.mean(mses)), 'std_mse': float(np.std(mses)),
+            'mean_nonzero': float(np.mean(nonzero[c])), 'pruned_after': pruned_after.get(c),
+            'created': created,
+        }
+        for c, mses in scores.items()
+    ])
+    with sqlite3.connect(db_path) as db:
+        db.executescript(SCHEMA)
+        db.executemany(f"INSERT INTO folds VALUES ({', '.join('?' * 12)})", fold_rows)
+        if len(results):
+            db.executemany(
+                f"INSERT INTO results VALUES ({', '.join('?' * 11)})",
+                results.astype(object).where(results.notna(), None).itertuples(index=False, name=None)
+            )
+    print(f"run {run_id}: {len(results)} candidates, {len(fold_rows)} fold scores -> {db_path}")
+    if not len(results):
+        return results
+    return results.sort_values(['window_size', 'stride', 'mean_mse'], kind='stable').reset_index(drop=True)
+
+
+def load_results(db_path: str = DEFAULT_DB, run_id: str = None) -> pd.DataFrame:
+    """Results of run_id (default: the latest run), best first within each (window_size, stride)."""
+    with sqlite3.connect(db_path) as db:
+        if run_id is None:
+            run_id = db.execute("SELECT run_id FROM results ORDER BY created DESC, rowid DESC LIMIT 1").fetchone()[0]
+        return pd.read_sql_query(
+            "SELECT * FROM results WHERE run_id = ? ORDER BY window_size, stride, mean_mse", db, params=(run_id,)
+        )
+
+
+def main(args):
+    df = Model_utils.load_data(args.data)
+    results = run_sweep(
+        df, args.degrees, args.window_sizes, args.strides, args.alphas, horizon=args.horizon,
+        n_jobs=args.n_jobs, min_folds=args.min_folds, prune_ratio=None if args.no_prune else args.prune_ratio,
+        sparse=not args.dense, db_path=args.db
+    )
+    # the best few of each (window_size, stride); MSEs are only comparable within one
+    best = results.groupby(['window_size', 'stride'], sort=False).head(3)
+    print(best.drop(columns=['run_id', 'created']).to_string())
+
+
+if __name__ == '__main__':
+    # arguments are declared once, on the cli.py sweep command
+    import sys
+    from cli import main as cli_main
+    cli_main(['sweep'] + sys.argv[1:])
@@ -0,0 +1,55 @@
+# tests/conftest.py
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import clean  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def _load_script(relpath, name):
+    # projectv2/c.py and Ethan_code/c.py are both "c", so each is loaded under its own name
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relpath))
+    module = importlib.util.module_from_spec(spec)
+    # registered so pickle (e.g. for a process pool) can find the module's functions
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def projectv2_c():
+    return _load_script(os.path.join('projectv2', 'c.py'), 'projectv2_c')
+
+
+@pytest.fixture(scope='session')
+def ethan_c():
+    return _load_script(os.path.join('Ethan_code', 'c.py'), 'ethan_c')
+
+
+@pytest.fixture(scope='session')
+def ethan_da():
+    return _load_script(os.path.join('Ethan_code', 'DA.py'), 'ethan_da')
+
+
+@pytest.fixture(scope='session')
+def projectv2_pca():
+    return _load_script(os.path.join('projectv2', 'PCA.py'), 'projectv2_pca')
+
+
+@pytest.fixture(scope='session')
+def source_frame():
+    """Four months of the synthetic source file; shared by the session, so tests must not modify it."""
+    return synthetic.generate(scale=4 / synthetic.BASE_MONTHS, seed=1)
+
+
+@pytest.fixture(scope='session')
+def encoded_frame(source_frame):
+    """source_frame aggregated and encoded the way clean.main does; shared like source_frame."""
+    return clean.convert(clean.aggregate(source_frame))
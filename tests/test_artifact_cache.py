@@ -0,0 +1,76 @@
+# tests/test_artifact_cache.py
+"""The content-addressed frame cache in artifact_cache.py."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import artifact_cache
+from artifact_cache import cached_frame, load_frame, save_frame
+
+
+@pytest.mark.parametrize('parquet', [True, False])
+def test_frame_round_trip(tmp_path, monkeypatch, parquet):
+    if parquet and not artifact_cache._parquet_available():
+        pytest.skip('pyarrow is not importable')
+    # without pyarrow, frames are cached as pickles
+    monkeypatch.setattr(artifact_cache, '_parquet_available', lambda: parquet)
+    df = pd.DataFrame({
+        'time': np.arange(4, dtype=np.int32),
+        'age': np.array([2, 8, np.nan, 80], dtype=np.float32),
+        'race_White': np.array([1, 0, 0, 1], dtype=np.uint8),
+        'region': ['Region 1', 'Region 2', '', 'Region 10'],
+    })
+    df.attrs['fill_values'] = {'age': 30.0}
+    path = save_frame(df, 'encoded', 'k' * 64, cache_dir=str(tmp_path))
+    assert path.endswith('.parquet' if parquet else '.pkl')
+
+    loaded = load_frame('encoded', 'k' * 64, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded.attrs == df.attrs
+    assert load_frame('encoded', 'x' * 64, cache_dir=str(tmp_path)) is None
+
+
+def test_cached_frame_rebuilds_on_changed_source_or_params(tmp_path):
+    source = tmp_path / 'covid_data.csv'
+    source.write_text('a\n1\n')
+    builds = []
+
+    def build():
+        builds.append(1)
+        return pd.read_csv(source)
+
+    def cached(params):
+        return cached_frame('cleaned', build, sources=[str(source)], params=params, cache_dir=str(tmp_path))
+
+    df, key = cached({'version': 1})
+    again, same = cached({'version': 1})
+    assert same == key and len(builds) == 1
+    pd.testing.assert_frame_equal(again, df)
+
+    _, other = cached({'version': 2})
+    assert other != key and len(builds) == 2
+
+    source.write_text('a\n1\n2\n')
+    df, _ = cached({'version': 1})
+    assert len(builds) == 3 and df['a'].tolist() == [1, 2]
+
+
+def test_concurrent_digests_keep_every_entry(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = []
+    for i in range(64):
+        path = tmp_path / f'source_{i}.csv'
+        path.write_text(f'a\n{i}\n')
+        paths.append(str(path))
+    cache_dir = str(tmp_path / 'cache')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        digests = list(pool.map(lambda p: artifact_cache.file_digest(p, cache_dir), paths))
+
+    with open(os.path.join(cache_dir, 'digests.json')) as f:
+        index = json.load(f)
+    assert [index[os.path.abspath(p)]['digest'] for p in paths] == digests
+    assert not [name for name in os.listdir(cache_dir) if name.endswith('.tmp')]
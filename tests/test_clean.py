@@ -0,0 +1,54 @@
+# tests/test_clean.py
+"""clean.py's parsing and the encoded frame's schema."""
+import numpy as np
+import pandas as pd
+
+import clean
+
+
+def test_parse_numeric_keeps_coercing_columns_with_blanks():
+    parsed = clean._parse_numeric(pd.Series(['1', '', '2.5'], dtype=object))
+    assert parsed.dtype == np.float64
+    assert parsed.isna().tolist() == [False, True, False]
+    assert clean._parse_numeric(pd.Series(['1', 'n/a', '2'], dtype=object)) is None
+
+
+def test_convert_builds_the_encoded_schema(encoded_frame):
+    encoded = encoded_frame
+    assert encoded.dtypes.to_dict() == {col: np.dtype(t) for col, t in clean.encoded_dtypes(encoded.columns).items()}
+
+
+def test_bool_chunk_next_to_a_blank_chunk_reads_as_object(tmp_path):
+    assert clean._merge_dtype(np.dtype(bool), np.dtype('float64')) == np.dtype(object)
+    assert clean._merge_dtype(np.dtype('int64'), np.dtype('float64')) == np.dtype('float64')
+    path = tmp_path / 'flags.csv'
+    path.write_text('x,flag\n0,True\n1,True\n2,\n3,False\n')
+    # a bool dtype for the whole column would fail on the blank in the second chunk
+    assert len(clean.clean_data(str(path), chunksize=2)) == 4
+
+
+def test_chunked_clean_matches_in_memory(tmp_path):
+    rows = [
+        # id turns float, flag has a blank, code is numeric text until a letter shows up,
+        # sparse is mostly empty (dropped), rate has gaps filled with the mean
+        'id,flag,code,sparse,rate,group',
+        '1,True,10,,1.5,a',
+        '2,False,11,x,,b',
+        '1,True,10,,1.5,a',       # duplicate within the first chunk
+        '3,,12,,2.5,a',
+        '2,False,11,x,,b',        # duplicate of a row two chunks back
+        '4.5,True,A7,,,c',
+        '5,False,13,,4.0,',
+        '1,True,10,,1.5,a',       # duplicate in the last chunk
+        '6,True,14,,5.0,b',
+    ]
+    path = tmp_path / 'mixed.csv'
+    path.write_text('\n'.join(rows) + '\n')
+
+    expected = clean.clean_data(str(path))
+    assert expected['id'].dtype == np.float64
+    assert 'sparse' not in expected.columns and len(expected) == 6
+    for chunksize in (1, 2, 3, 4):
+        chunked = clean.clean_data(str(path), chunksize=chunksize)
+        pd.testing.assert_frame_equal(chunked, expected)
+        assert chunked.attrs == expected.attrs
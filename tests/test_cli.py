@@ -0,0 +1,30 @@
+"""cli.py predict: reading rows and writing predictions."""
+import io
+import sys
+
+import numpy as np
+
+import cli
+from model_bundle import poly2_expand, poly2_names, save_bundle
+
+
+def test_predict_leaves_stdin_and_stdout_open(tmp_path, monkeypatch, capsys):
+    rng = np.random.default_rng(0)
+    coef, intercept = rng.normal(size=(2, 6)), rng.normal(size=2)
+    bundle = str(tmp_path / 'bundle.bin')
+    save_bundle(bundle, coef, intercept, poly2_names(['a', 'b']), metadata={'input_features': ['a', 'b']})
+    expected = poly2_expand([[1.0, 2.0], [3.0, 0.0]]) @ coef.T + intercept
+
+    stdin = io.StringIO('a,b\n1,2\n3,0\n')
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    cli.main(['predict', '-', '--bundle', bundle])
+    assert not stdin.closed and not sys.stdout.closed
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == 'window_0,window_1'
+    np.testing.assert_allclose([[float(v) for v in line.split(',')] for line in lines[1:]], expected)
+
+    rows = tmp_path / 'rows.json'
+    rows.write_text('{"rows": [{"a": 1, "b": 2}, {"a": 3, "b": 0}]}')
+    cli.main(['predict', str(rows), '--bundle', bundle, '-o', str(tmp_path / 'out.csv')])
+    written = np.loadtxt(tmp_path / 'out.csv', delimiter=',', skiprows=1)
+    np.testing.assert_allclose(written, expected)
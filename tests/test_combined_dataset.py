@@ -0,0 +1,51 @@
+# tests/test_combined_dataset.py
+"""Ethan_code's single-join combined dataset against the checked-in combined_dataset.csv."""
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from regions import hhs_regions
+
+
+def covid_rows(expected):
+    """
+    A CDC-shaped frame whose Sex rows add up to the expected deaths per year and
+    region, split over two states and both sexes, plus rows the builder must ignore.
+    """
+    rows = []
+    for year, region, deaths in expected[['Year', 'Region', 'Deaths']].itertuples(index=False):
+        first, second = hhs_regions[str(region)][:2]
+        share = int(deaths) // 3
+        for state, sex, count in ((first, 'Female', share), (first, 'Male', share),
+                                  (second, 'Female', int(deaths) - 2 * share)):
+            rows.append((str(year), state, 'Sex', sex, str(count)))
+        rows.append((str(year), second, 'Sex', 'Male', ''))                   # suppressed count
+        rows.append((str(year), first, 'Race', 'Hispanic', '999'))             # another breakdown
+        rows.append((str(year), f'Region {region}', 'Sex', 'Female', '999'))   # region, not state, row
+    rows.append(('2020', 'United States', 'Sex', 'Male', '999'))
+    return pd.DataFrame(rows, columns=['year', 'jurisdiction_residence', 'group', 'subgroup1', 'COVID_deaths'])
+
+
+def region_rows(expected):
+    """Like the real CDC export: the deaths reported on "Region N" rows, with no state rows at all."""
+    rows = []
+    for year, region, deaths in expected[['Year', 'Region', 'Deaths']].itertuples(index=False):
+        share = int(deaths) // 2
+        for sex, count in (('Female', share), ('Male', int(deaths) - share)):
+            rows.append((str(year), f'Region {region}', 'Sex', sex, str(count)))
+        rows.append((str(year), f'Region {region}', 'Sex', 'Unknown', ''))    # suppressed count
+        rows.append((str(year), f'Region {region}', 'Race', 'Hispanic', '999'))
+        rows.append((str(year), 'United States', 'Sex', 'Male', '999'))
+    return pd.DataFrame(rows, columns=['year', 'jurisdiction_residence', 'group', 'subgroup1', 'COVID_deaths'])
+
+
+@pytest.mark.parametrize('covid_df', [covid_rows, region_rows])
+def test_matches_combined_dataset(ethan_c, covid_df):
+    expected = pd.read_csv(os.path.join(ROOT, 'combined_dataset.csv'))
+    pop_df = pd.read_csv(os.path.join(ROOT, 'projectv2', 'NST-EST2024-ALLDATA.csv'))
+    political_df = pd.read_csv(os.path.join(ROOT, 'state_political_control.csv'))
+
+    combined = ethan_c.build_combined_dataset(covid_df(expected), pop_df, political_df)
+    pd.testing.assert_frame_equal(combined, expected)
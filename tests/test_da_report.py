@@ -0,0 +1,77 @@
+# tests/test_da_report.py
+"""Ethan_code/DA.py build_report: hash-based skips, re-renders and failed figures."""
+import json
+import os
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from conftest import ROOT
+
+
+# Stub figure tasks; module-level so the process pool can pickle them
+
+def trend_stub(trends):
+    fig = Figure(figsize=(2, 2))
+    fig.subplots().plot(trends['Year'], trends['%Death_Rate'])
+    return fig
+
+
+def rate_stub(death_rate):
+    fig = Figure(figsize=(2, 2))
+    fig.subplots().plot(death_rate)
+    return fig
+
+
+def failing_stub(reg_score):
+    raise ValueError(f'cannot draw {reg_score:.2f}')
+
+
+@pytest.fixture
+def report(ethan_da, tmp_path, monkeypatch):
+    """build_report over the stubs, on a fixed snapshot of the checked-in combined dataset."""
+    snap = ethan_da.snapshot(os.path.join(ROOT, 'combined_dataset.csv'))
+    monkeypatch.setattr(ethan_da, 'snapshot', lambda path: snap)
+    monkeypatch.setattr(ethan_da, 'FIGURES', {'trends.png': trend_stub, 'rate.png': rate_stub})
+    results_dir = str(tmp_path / 'Results')
+
+    def build(**kwargs):
+        return ethan_da.build_report('unused.csv', results_dir, max_workers=2, **kwargs)
+    return build, snap, results_dir
+
+
+def test_unchanged_figures_are_skipped(report):
+    build, _, results_dir = report
+    assert build() == ['trends.png', 'rate.png']
+    with open(os.path.join(results_dir, '.figure_hashes.json')) as f:
+        assert set(json.load(f)) == {'trends.png', 'rate.png'}
+    assert os.path.exists(os.path.join(results_dir, 'analysis_summary.txt'))
+
+    assert build() == []
+    assert build(force=True) == ['trends.png', 'rate.png']
+    # a figure whose file went missing is drawn again even though its hash matches
+    os.remove(os.path.join(results_dir, 'rate.png'))
+    assert build() == ['rate.png']
+
+
+def test_changed_inputs_rerender_only_their_figures(report):
+    build, snap, _ = report
+    build()
+    snap['death_rate'] = np.asarray(snap['death_rate']) * 2
+    assert build() == ['rate.png']
+
+
+def test_failed_figures_are_not_reported_as_built(ethan_da, report, monkeypatch):
+    build, _, results_dir = report
+    monkeypatch.setitem(ethan_da.FIGURES, 'broken.png', failing_stub)
+    with pytest.raises(RuntimeError, match=r'1 of 3 figures failed \(broken.png: ValueError') as info:
+        build()
+    assert isinstance(info.value.__cause__, ValueError)
+
+    # the figures that did render are recorded, so a re-run retries only the failure
+    with open(os.path.join(results_dir, '.figure_hashes.json')) as f:
+        assert set(json.load(f)) == {'trends.png', 'rate.png'}
+    assert not os.path.exists(os.path.join(results_dir, 'broken.png'))
+    monkeypatch.setitem(ethan_da.FIGURES, 'broken.png', rate_stub)
+    assert build() == ['broken.png']
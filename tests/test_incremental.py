@@ -0,0 +1,47 @@
+# tests/test_incremental.py
+"""Incremental retraining refits only the windows whose rows changed."""
+import pytest
+
+import clean
+from conftest import synthetic
+from model_utils import Model_utils
+
+
+def encode_and_train():
+    clean.main()
+    windows, _ = Model_utils.preprocess(Model_utils.load_data('df_encoded.csv'), 2)
+    _, refitted = Model_utils.train_incremental(windows, 'models/model_month_{}.pkl', 'models/manifest.json')
+    return refitted
+
+
+def test_appending_a_month_refits_only_the_new_window(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    full = synthetic.generate(scale=8 / synthetic.BASE_MONTHS, seed=1)
+    months = full['year'] * 12 + full['month']
+    # suppressed rates are filled with a whole-file mean, so the new month would shift it
+    assert full['crude_COVID_rate'].isna().any()
+
+    full[months < months.max()].to_csv('covid_data.csv', index=False)
+    assert encode_and_train() == list(range(6))
+    full.to_csv('covid_data.csv', index=False)
+    assert encode_and_train() == [6]
+    assert encode_and_train() == []
+
+
+def test_appended_months_keep_the_pinned_vocabulary(source_frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    full = source_frame
+    months = full['year'] * 12 + full['month']
+    last = months == months.max()
+
+    # a region that only reports from the appended month on
+    full[~last & (full['jurisdiction_residence'] != 'Region 10')].to_csv('covid_data.csv', index=False)
+    clean.main()
+    columns = list(Model_utils.load_data('df_encoded.csv').columns)
+    assert 'jurisdiction_residence_Region 10' not in columns
+    assert 'Region 10' not in clean.load_encoding_params()['vocabulary']['jurisdiction_residence']
+
+    # a category the pinned vocabulary lacks would change every window's features
+    full.to_csv('covid_data.csv', index=False)
+    with pytest.raises(ValueError, match='outside the encoding vocabulary'):
+        clean.main()
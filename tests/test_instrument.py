@@ -0,0 +1,88 @@
+# tests/test_instrument.py
+"""instrument.py's stage records and the JSON run report."""
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import instrument
+from instrument import RunReport, run, stage
+from model_utils import Model_utils
+
+
+def test_nested_stages_name_their_parent():
+    with run() as report:
+        with stage('outer', rows=3):
+            with stage('inner') as record:
+                record['features'] = 2
+    inner, outer = report.stages
+    assert (inner['stage'], inner['parent'], inner['features']) == ('inner', 'outer', 2)
+    assert (outer['stage'], outer['parent'], outer['rows']) == ('outer', None, 3)
+    assert outer['wall_s'] >= inner['wall_s'] >= 0 and outer['start_s'] <= inner['start_s']
+
+
+def test_threads_keep_their_own_stacks_and_peaks():
+    report = RunReport()
+    inside, release = threading.Barrier(3), threading.Event()
+
+    def work(name, mb):
+        with report.stage(name):
+            with report.stage(f'{name}_alloc'):
+                block = np.ones(mb * 2**20 // 8)
+                inside.wait()
+                release.wait()
+                del block
+
+    with run(trace_memory=True):
+        threads = [threading.Thread(target=work, args=(name, mb)) for name, mb in (('a', 8), ('b', 16))]
+        for t in threads:
+            t.start()
+        inside.wait()
+        release.set()
+        for t in threads:
+            t.join()
+
+    records = {r['stage']: r for r in report.stages}
+    # each thread nests under its own outer stage, not under whichever stage opened last
+    assert records['a_alloc']['parent'] == 'a' and records['b_alloc']['parent'] == 'b'
+    # the peak is process-wide, so overlapping stages may be over-counted but never under-counted
+    for name, mb in (('a', 8), ('b', 16)):
+        assert records[f'{name}_alloc']['peak_mb'] >= mb and records[name]['peak_mb'] >= mb
+
+
+def test_a_stage_that_raises_is_recorded_with_its_error():
+    with run() as report:
+        with pytest.raises(ValueError):
+            with stage('outer'):
+                with stage('failing'):
+                    raise ValueError('bad window')
+    failing, outer = report.stages
+    assert failing['error'] == 'ValueError: bad window' and 'wall_s' in failing
+    assert outer['error'] == 'ValueError: bad window'
+
+
+def test_report_json_shape(tmp_path):
+    path = tmp_path / 'reports' / 'run.json'
+    with run(str(path)):
+        with stage('load', rows=10):
+            pass
+        instrument.add_stage('fit', 0.5, 0.25, window=0)
+    report = json.loads(path.read_text())
+    assert set(report) == {'started', 'total_wall_s', 'stages'}
+    load, fit = report['stages']
+    assert set(load) == {'stage', 'parent', 'start_s', 'rows', 'wall_s', 'cpu_s', 'peak_mb'}
+    assert fit == {'stage': 'fit', 'parent': None, 'start_s': fit['start_s'], 'window': 0,
+                   'wall_s': 0.5, 'cpu_s': 0.25}
+
+
+def test_pooled_fits_are_recorded_per_window(encoded_frame, tmp_path):
+    windows, _ = Model_utils.preprocess(encoded_frame, 2)
+    with run() as report:
+        models = Model_utils.train_windows(windows, str(tmp_path / 'model_{}.pkl'), n_jobs=2)
+    assert len(models) == len(windows)
+    fits = [r for r in report.stages if r['stage'] == 'fit']
+    assert [r['window'] for r in fits] == list(range(len(windows)))
+    for i, r in enumerate(fits):
+        assert r['parent'] == 'fit_pool' and r['rows'] == windows[i][0].shape[0]
+        assert r['wall_s'] > 0 and r['cpu_s'] >= 0
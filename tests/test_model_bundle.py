@@ -0,0 +1,81 @@
+"""The memory-mapped model bundle, and migrating the per-window pickles into one."""
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import Lasso
+
+import clean
+from model import BUNDLE_PATH, Model
+from model_bundle import ModelBundle, save_bundle
+from model_utils import Model_utils
+
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    coef, intercept = rng.normal(size=(3, 4)), rng.normal(size=3)
+    alphas = np.array([1.0, 0.1, 0.01])
+    coef_path, intercept_path = rng.normal(size=(3, 3, 4)), rng.normal(size=(3, 3))
+    path = str(tmp_path / 'bundle.bin')
+    save_bundle(path, coef, intercept, ['1', 'a', 'b', 'a b'], metadata={'mode': 'path'},
+                arrays={'alphas': alphas, 'coef_path': coef_path, 'intercept_path': intercept_path})
+
+    bundle = ModelBundle(path)
+    assert len(bundle) == 3 and list(bundle.feature_names) == ['1', 'a', 'b', 'a b']
+    assert bundle.metadata == {'mode': 'path'}
+    np.testing.assert_array_equal(bundle.coef, coef)
+    np.testing.assert_array_equal(bundle.intercept, intercept)
+    np.testing.assert_array_equal(bundle.alphas, alphas)
+    np.testing.assert_array_equal(bundle.arrays['coef_path'], coef_path)
+    # views into the read-only map, not copies
+    assert not bundle.coef.flags.owndata and not bundle.coef.flags.writeable
+
+    X = rng.normal(size=(5, 4))
+    np.testing.assert_allclose(bundle.predict(X), X @ coef.T + intercept)
+    # 0.09 is nearest to 0.1 on a log scale
+    np.testing.assert_allclose(bundle.predict(X, alpha=0.09), X @ coef_path[:, 1].T + intercept_path[:, 1])
+    np.testing.assert_allclose(bundle.models()[2].predict(X), X @ coef[2] + intercept[2])
+
+
+def test_alpha_needs_a_path(tmp_path):
+    path = str(tmp_path / 'bundle.bin')
+    save_bundle(path, np.zeros((2, 3)), np.zeros(2), ['1', 'a', 'b'])
+    assert ModelBundle(path).alphas is None
+    with pytest.raises(ValueError, match='no regularization path'):
+        ModelBundle(path).predict(np.zeros((1, 3)), alpha=0.1)
+
+
+@pytest.fixture
+def encoded(encoded_frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    clean.write_encoded(encoded_frame)
+    return Model_utils.preprocess(Model_utils.load_data('df_encoded.csv'), 2)
+
+
+def test_migrates_legacy_pickles(encoded):
+    windows, poly_feature_names = encoded
+    models = Model_utils.train_windows(windows, 'models/model_month_{}.pkl')
+    assert not os.path.exists(BUNDLE_PATH)
+
+    loaded = Model()
+    bundle = ModelBundle(BUNDLE_PATH)
+    assert bundle.metadata['mode'] == 'migrated' and list(bundle.feature_names) == list(poly_feature_names)
+    for i, model in enumerate(models):
+        np.testing.assert_array_equal(bundle.coef[i], model.coef_)
+        np.testing.assert_array_equal(loaded.models[i].coef_, model.coef_)
+    # later loads read the bundle alone
+    for i in range(len(models)):
+        os.remove(f'models/model_month_{i}.pkl')
+    np.testing.assert_allclose(Model().test_models(), loaded.test_models())
+
+
+def test_refuses_stale_pickles(encoded):
+    windows, _ = encoded
+    os.makedirs('models')
+    for i in range(len(windows)):
+        # trained on an encoding with other columns
+        joblib.dump(Lasso().fit(np.eye(4), np.arange(4.0)), f'models/model_month_{i}.pkl')
+    with pytest.raises(ValueError, match='has 4 coefficients'):
+        Model()
+    assert not os.path.exists(BUNDLE_PATH)
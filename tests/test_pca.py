@@ -0,0 +1,35 @@
+# tests/test_pca.py
+"""projectv2/PCA.py: the chunked PCA against the in-memory one."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from conftest import ROOT
+
+
+def test_streaming_matches_in_memory(projectv2_pca):
+    # the merged frame main.py scales into std_df.csv; ~29k rows, so 30 chunks
+    path = os.path.join(ROOT, 'projectv2', 'death_results.csv')
+    ratios, loadings = projectv2_pca.pca_in_memory(path, n_components=3)
+    stream_ratios, stream_loadings = projectv2_pca.pca_streaming(path, n_components=3, chunksize=1000)
+
+    np.testing.assert_allclose(stream_ratios, ratios, rtol=1e-9)
+    pd.testing.assert_index_equal(stream_loadings.columns, loadings.columns)
+    # a component's sign is arbitrary
+    signs = np.sign((stream_loadings.to_numpy() * loadings.to_numpy()).sum(axis=1))
+    np.testing.assert_allclose(stream_loadings.to_numpy() * signs[:, None], loadings.to_numpy(), atol=1e-9)
+
+
+def test_streaming_columns_come_from_the_whole_file(projectv2_pca, tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(60, 3)), columns=['a', 'b', 'c'])
+    df['c'] += df['a']
+    # numeric in the first chunk, text after it
+    df['code'] = np.where(df.index < 20, '1', 'x')
+    path = tmp_path / 'std_df.csv'
+    df.to_csv(path, index=False)
+
+    _, loadings = projectv2_pca.pca_in_memory(path, n_components=2)
+    _, stream_loadings = projectv2_pca.pca_streaming(path, n_components=2, chunksize=20)
+    assert list(stream_loadings.columns) == list(loadings.columns) == ['a', 'b', 'c']
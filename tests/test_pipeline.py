@@ -0,0 +1,110 @@
+# tests/test_pipeline.py
+"""pipeline.Pipeline caching, and the pipeline in main.py on a small synthetic source."""
+import os
+
+import pytest
+
+import cli
+from main import build_pipeline
+from model_bundle import ModelBundle
+from pipeline import Pipeline, Stage
+
+
+@pytest.fixture
+def source(source_frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source_frame.to_csv('covid_data.csv', index=False)
+    return 'covid_data.csv'
+
+
+@pytest.mark.parametrize('output', ['report.pdf', 'pngs'])
+def test_report_output_is_cached(source, output, capsys):
+    features = build_pipeline(source, report_output=output).run(targets=['report'])['report']
+    assert features and os.path.exists(output)
+    if output == 'pngs':
+        assert len(os.listdir(output)) == len(features)
+    capsys.readouterr()
+
+    assert build_pipeline(source, report_output=output).run(targets=['report'])['report'] == features
+    assert '[cached] report' in capsys.readouterr().out
+
+
+def _read(path, log):
+    log.append('read')
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _count(text, factor, log):
+    log.append('count')
+    return len(text) * factor
+
+
+def _write(n, log):
+    log.append('write')
+    with open('count.txt', 'w') as f:
+        f.write(str(n))
+    return n
+
+
+def toy_pipeline(log, factor=1):
+    # log is an option, so recording the calls does not change any key
+    return Pipeline([
+        Stage('read', _read, sources=['words.txt'], params={'path': 'words.txt'}, options={'log': log}),
+        Stage('count', _count, inputs=['read'], params={'factor': factor}, options={'log': log}),
+        Stage('write', _write, inputs=['count'], outputs=['count.txt'], options={'log': log}),
+    ], cache_dir='pipeline')
+
+
+def run_toy(**kwargs):
+    log = []
+    result = toy_pipeline(log, **kwargs).run(verbose=False)['write']
+    return result, log
+
+
+def test_cache_hits_and_invalidation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('words.txt', 'w') as f:
+        f.write('abc')
+    assert run_toy() == (3, ['read', 'count', 'write'])
+    assert run_toy() == (3, [])
+
+    # a changed parameter re-runs its stage and what depends on it
+    assert run_toy(factor=2) == (6, ['count', 'write'])
+    # a source edit that gives the same result stops there (early cutoff)
+    with open('words.txt', 'w') as f:
+        f.write('abc\n')
+    assert run_toy(factor=2) == (6, ['read'])
+    with open('words.txt', 'w') as f:
+        f.write('abcd')
+    assert run_toy(factor=2) == (8, ['read', 'count', 'write'])
+
+    # an output overwritten by someone else is rewritten
+    with open('count.txt', 'w') as f:
+        f.write('0')
+    assert run_toy(factor=2) == (8, ['write'])
+    os.remove('count.txt')
+    assert run_toy(factor=2) == (8, ['write'])
+
+
+def test_evaluate_reuses_the_trained_mode(source, capsys):
+    cli.main(['train', '--mode', 'path'])
+    capsys.readouterr()
+    cli.main(['evaluate'])
+    out = capsys.readouterr().out
+    assert '[cached] train' in out and '[run] train' not in out
+    # the bundle still holds the path, so predicting at an alpha works
+    assert ModelBundle('models/model_bundle.bin').alphas is not None
+
+
+def test_report_at_an_alpha(source, capsys):
+    with pytest.raises(SystemExit, match='--mode path'):
+        cli.main(['report', '--alpha', '0.01'])
+    cli.main(['train', '--mode', 'path'])
+    cli.main(['report', '--alpha', '1.0', '-o', 'strong.pdf'])
+    cli.main(['report', '--alpha', '0.001', '-o', 'weak.pdf'])
+    strong, weak = (build_pipeline(source, report_output=f'{name}.pdf', report_alpha=alpha)
+                    .run(targets=['report'])['report'] for name, alpha in (('strong', 1.0), ('weak', 0.001)))
+    # a weaker penalty keeps more features
+    assert len(strong) < len(weak)
+    assert '[cached] train' in capsys.readouterr().out
@@ -0,0 +1,36 @@
+# tests/test_political_control.py
+"""Vectorized political-control shares against the outputs of the old iterrows loops."""
+import os
+import shutil
+
+import pandas as pd
+
+from conftest import DATA, ROOT
+from regions import political_control_shares
+
+PROJECTV2 = os.path.join(ROOT, 'projectv2')
+
+
+def test_shares_match_political_results(projectv2_c, monkeypatch):
+    # political_results.csv was written by the loop analyze_political_control replaced
+    monkeypatch.chdir(PROJECTV2)
+    expected = pd.read_csv('political_results.csv')
+    pd.testing.assert_frame_equal(projectv2_c.analyze_political_control(), expected)
+
+
+def test_shares_of_a_subset_of_years():
+    political_df = pd.read_csv(os.path.join(PROJECTV2, 'state_political_control_2020_2025.csv'))
+    expected = pd.read_csv(os.path.join(PROJECTV2, 'political_results.csv'))
+    shares = political_control_shares(political_df[political_df['Year'] == 2022])
+    pd.testing.assert_frame_equal(shares, expected[expected['Year'] == 2022].reset_index(drop=True))
+
+
+def test_ethan_report_text(ethan_c, tmp_path, monkeypatch):
+    # political_report.txt is the report the old Ethan_code loop printed for the same file
+    (tmp_path / 'attached_assets').mkdir()
+    shutil.copy(os.path.join(ROOT, 'state_political_control.csv'),
+                tmp_path / 'attached_assets' / 'state_political_control_2020_2025.csv')
+    monkeypatch.chdir(tmp_path)
+    with open(os.path.join(DATA, 'political_report.txt')) as f:
+        expected = f.read()
+    assert '\n'.join(ethan_c.analyze_political_control()) + '\n' == expected
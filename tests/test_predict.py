@@ -0,0 +1,35 @@
+"""Model_utils.predict_all against one predict_new call per window model."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Lasso
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+from model_bundle import ModelBundle, bundle_models
+from model_utils import Model_utils
+
+
+@pytest.fixture(scope='module')
+def encoded(encoded_frame):
+    return encoded_frame.astype(float)
+
+
+@pytest.mark.parametrize('scaled', [True, False])
+def test_predict_all_matches_predict_new(encoded, scaled, tmp_path):
+    X = encoded.drop(columns=['crude_COVID_rate'])
+    y = encoded[['crude_COVID_rate']]
+    x_scaler = StandardScaler().fit(X) if scaled else None
+    y_scaler = StandardScaler().fit(y) if scaled else None
+    X_fit = pd.DataFrame(x_scaler.transform(X), columns=X.columns) if scaled else X
+    y_fit = y_scaler.transform(y).ravel() if scaled else y.to_numpy().ravel()
+    poly = PolynomialFeatures(degree=2).fit(X_fit)
+    X_poly = poly.transform(X_fit)
+
+    # one model per alpha stands in for the window models
+    models = [Lasso(alpha=alpha, max_iter=10_000).fit(X_poly, y_fit) for alpha in (1.0, 0.1, 0.01)]
+    expected = np.column_stack([Model_utils.predict_new(encoded, x_scaler, y_scaler, poly, m) for m in models])
+
+    np.testing.assert_allclose(Model_utils.predict_all(encoded, x_scaler, y_scaler, poly, models), expected)
+    bundle_models(str(tmp_path / 'bundle.bin'), models, poly.get_feature_names_out())
+    bundle = ModelBundle(str(tmp_path / 'bundle.bin'))
+    np.testing.assert_allclose(Model_utils.predict_all(encoded, x_scaler, y_scaler, poly, bundle), expected)
@@ -0,0 +1,48 @@
+# tests/test_regions.py
+"""The shared HHS region dimension against the pre-change projectv2 outputs."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from conftest import ROOT
+from regions import deaths_by_region, hhs_regions, region_of, state_region
+
+
+def test_population_matches_hhs_results(projectv2_c, monkeypatch):
+    # hhs_results.csv was written by the per-state loop population_by_region replaced
+    monkeypatch.chdir(os.path.join(ROOT, 'projectv2'))
+    expected = pd.read_csv('hhs_results.csv')
+    pd.testing.assert_frame_equal(projectv2_c.analyze_hhs_regions(), expected)
+
+
+def test_state_and_region_lookup():
+    for region, states in hhs_regions.items():
+        assert (state_region(states) == int(region)).all()
+    names = ['Texas', 'Region 7', 'United States', 'Puerto Rico']
+    np.testing.assert_array_equal(state_region(names), [6, 0, 0, 0])
+    np.testing.assert_array_equal(region_of(names), [6, 7, 0, 0])
+
+
+def test_deaths_prefer_state_rows():
+    covid_df = pd.DataFrame({
+        'year': ['2021', '2021', '2021', '2021', '2021'],
+        'jurisdiction_residence': ['Iowa', 'Kansas', 'Region 7', 'United States', 'Iowa'],
+        'group': ['Sex', 'Sex', 'Sex', 'Sex', 'Race'],
+        'COVID_deaths': ['10', '', '500', '900', '7'],
+    })
+    deaths = deaths_by_region(covid_df)
+    assert deaths.to_dict('records') == [{'Year': 2021, 'Region': 7, 'Deaths': 10.0}]
+
+
+def test_deaths_from_region_rows():
+    # the real export has no state rows, only the nation and "Region N"
+    covid_df = pd.DataFrame({
+        'year': ['2021', '2021', '2021', '2022', '2021'],
+        'jurisdiction_residence': ['Region 7', 'Region 7', 'United States', 'Region 1', 'Region 7'],
+        'group': ['Sex', 'Sex', 'Sex', 'Sex', 'Race'],
+        'COVID_deaths': ['500', '20', '900', '', '7'],
+    })
+    deaths = deaths_by_region(covid_df)
+    assert deaths.to_dict('records') == [{'Year': 2021, 'Region': 7, 'Deaths': 520.0},
+                                         {'Year': 2022, 'Region': 1, 'Deaths': 0.0}]
@@ -0,0 +1,59 @@
+# tests/test_running_stats.py
+"""RunningStats against DataFrame.corr / DataFrame.cov."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from conftest import ROOT
+from running_stats import RunningStats
+
+
+def chunks(df, size):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def test_corr_of_combined_dataset():
+    # the correlation matrix Ethan_code/DA.py draws
+    df = pd.read_csv(os.path.join(ROOT, 'combined_dataset.csv'))
+    stats = RunningStats.from_chunks(chunks(df, 7))
+    # columns constant in the data have an undefined correlation in both
+    pd.testing.assert_frame_equal(stats.corr(), df.corr(numeric_only=True), rtol=1e-9, atol=1e-12)
+    pd.testing.assert_frame_equal(stats.cov(), df.cov(numeric_only=True), rtol=1e-9)
+
+
+def test_missing_values_and_merge():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(1e6, 3, size=(500, 4)), columns=list('abcd'))
+    df['d'] = df['a'] * 2 + rng.normal(0, 1, 500)
+    df = df.mask(rng.random(df.shape) < 0.2)
+
+    # accumulators built separately (as in separate processes) and merged
+    left = RunningStats.from_chunks(chunks(df.iloc[:230], 50))
+    right = RunningStats.from_chunks(chunks(df.iloc[230:], 64))
+    stats = left.merge(right)
+
+    pd.testing.assert_frame_equal(stats.corr(), df.corr(), rtol=1e-9)
+    pd.testing.assert_frame_equal(stats.cov(), df.cov(), rtol=1e-9)
+    pd.testing.assert_series_equal(stats.means(), df.mean(), rtol=1e-12)
+    pd.testing.assert_series_equal(stats.count(), df.count().astype(float))
+
+
+def test_csv_columns_typed_over_the_whole_file(tmp_path):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(40, 3)), columns=['a', 'b', 'c'])
+    df['late'] = df['a'].where(df.index >= 10)                       # empty in the first chunk
+    df['note'] = np.where(df.index >= 30, 'revised', df['b'].astype(str))  # text further down
+    df['blank'] = np.nan
+    path = tmp_path / 'frame.csv'
+    df.to_csv(path, index=False)
+
+    expected = pd.read_csv(path).corr(numeric_only=True)
+    assert list(expected.columns) == ['a', 'b', 'c', 'late', 'blank']
+    stats = RunningStats.from_csv(path, chunksize=10)
+    pd.testing.assert_frame_equal(stats.corr(), expected, rtol=1e-9)
+
+    # rows filters each chunk before it is accumulated
+    kept = RunningStats.from_csv(path, chunksize=10, rows=lambda chunk: chunk.dropna(subset=['late']))
+    pd.testing.assert_frame_equal(kept.cov(), pd.read_csv(path).dropna(subset=['late']).cov(numeric_only=True),
+                                  rtol=1e-9)
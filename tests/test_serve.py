@@ -0,0 +1,52 @@
+"""serve.PredictionService against Model_utils.predict_all."""
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Lasso
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+from conftest import ROOT
+from model_utils import Model_utils
+
+pytest.importorskip('flask')
+from serve import PredictionService  # noqa: E402
+
+
+def test_does_not_import_sklearn():
+    code = "import sys, serve; sys.exit('sklearn' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=ROOT).returncode == 0
+
+
+def test_matches_predict_all():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(50, 10, size=(200, 3)), columns=['time', 'age', 'sex_Male'])
+    y = pd.DataFrame({'crude_COVID_rate': X['age'] * 0.3 + X['time'] ** 2 / 100 + rng.normal(size=200)})
+    x_scaler, y_scaler = StandardScaler().fit(X), StandardScaler().fit(y)
+    X_fit = pd.DataFrame(x_scaler.transform(X), columns=X.columns)
+    poly = PolynomialFeatures(degree=2).fit(X_fit)
+    models = [Lasso(alpha=alpha).fit(poly.transform(X_fit), y_scaler.transform(y).ravel()) for alpha in (0.1, 0.01)]
+
+    service = PredictionService(models, X.columns, x_scaler, y_scaler, max_wait=0)
+    rows = X.iloc[:20].to_dict('records')
+    expected = Model_utils.predict_all(X.iloc[:20], x_scaler, y_scaler, poly, models)
+    np.testing.assert_allclose(service.predict(rows), expected)
+    # the second time round every row comes from the cache
+    np.testing.assert_allclose(service.predict(rows), expected)
+    assert service.stats()['cache_hits'] == 20
+
+
+def test_cache_entries_do_not_hold_their_batch():
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(size=(50, 2)), columns=['time', 'age'])
+    poly = PolynomialFeatures(degree=2).fit(X)
+    models = [Lasso(alpha=0.01).fit(poly.transform(X), X['time'] + rng.normal(size=50))]
+
+    service = PredictionService(models, X.columns, max_wait=0)
+    service.predict(X.to_dict('records'))
+    entries = list(service._cache.values())
+    assert len(entries) == 50
+    # each entry owns its few floats instead of viewing the batch's (rows x windows) array
+    assert all(values.base is None and values.flags.owndata for values in entries)
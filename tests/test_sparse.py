@@ -0,0 +1,22 @@
+"""The CSR design matrix trains the same window models as the dense one."""
+import numpy as np
+import scipy.sparse as sp
+
+import clean
+from model import Model
+
+
+def test_sparse_matches_dense(encoded_frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    clean.write_encoded(encoded_frame)
+    dense = Model(train=True)
+    sparse = Model(train=True, sparse=True)
+    assert sp.issparse(sparse.windows.X) and not sp.issparse(dense.windows.X)
+
+    for i in range(len(dense.windows)):
+        np.testing.assert_allclose(sparse.models[i].coef_, dense.models[i].coef_, atol=1e-6)
+        np.testing.assert_allclose(sparse.models[i].intercept_, dense.models[i].intercept_, atol=1e-6)
+        # same random_state, so both split each window into the same rows
+        np.testing.assert_allclose(sparse.models[i].predict(sparse.windows[i][1]),
+                                   dense.models[i].predict(dense.windows[i][1]), atol=1e-6)
+    np.testing.assert_allclose(sparse.test_models(), dense.test_models(), atol=1e-6)
@@ -0,0 +1,52 @@
+# tests/test_sweep.py
+"""sweep.py's forward-chaining folds, pruning and the SQLite output."""
+import sqlite3
+
+import pandas as pd
+
+from sweep import forward_folds, load_results, run_sweep
+
+
+def test_forward_folds_validate_after_their_window():
+    assert forward_folds(6, 2, 1) == [(0, 2), (1, 3), (2, 4), (3, 5)]
+    assert forward_folds(6, 2, 2) == [(0, 2), (2, 4)]
+    # the horizon months after the last window have to exist
+    assert forward_folds(6, 2, 1, horizon=2) == [(0, 2), (1, 3), (2, 4)]
+    assert forward_folds(3, 3, 1) == []
+
+
+def test_pruning_stays_within_window_size_and_stride(encoded_frame, tmp_path):
+    results = run_sweep(
+        encoded_frame, degrees=(1, 2), window_sizes=(1, 2), alphas=(0.001, 0.1, 10.0),
+        min_folds=1, prune_ratio=1.0, db_path=str(tmp_path / 'sweep.db')
+    )
+    # a ratio of 1 keeps only each group's best; pruning across groups would keep one overall
+    survivors = results[results['pruned_after'].isna()]
+    assert sorted(survivors['window_size']) == [1, 2]
+    # survivors ran every fold of their group, and pruned candidates stopped after the first
+    assert (survivors['folds'] == survivors['window_size'].map({1: 3, 2: 2})).all()
+    assert (results.loc[results['pruned_after'].notna(), 'folds'] == 1).all()
+    # ranked within each group, never across them
+    assert list(results['window_size']) == sorted(results['window_size'])
+    for _, group in results.groupby('window_size'):
+        assert group['mean_mse'].is_monotonic_increasing
+
+
+def test_results_and_folds_are_written_to_sqlite(encoded_frame, tmp_path):
+    db_path = str(tmp_path / 'sweep.db')
+    results = run_sweep(encoded_frame, window_sizes=(1, 2), alphas=(0.01, 0.1), prune_ratio=None,
+                        db_path=db_path, run_id='test')
+    assert len(results) == 4 and set(results['run_id']) == {'test'}
+
+    with sqlite3.connect(db_path) as db:
+        folds = pd.read_sql_query("SELECT * FROM folds WHERE run_id = 'test'", db)
+    # three folds for window_size 1 and two for window_size 2, at each of the two alphas
+    assert len(folds) == 2 * (3 + 2)
+    assert (folds['val_month'] == folds['first_month'] + folds['window_size']).all()
+    per_candidate = folds.groupby(['window_size', 'alpha'])['mse'].mean()
+    for _, row in results.iterrows():
+        assert per_candidate[row['window_size'], row['alpha']] == row['mean_mse']
+
+    loaded = load_results(db_path)
+    pd.testing.assert_frame_equal(loaded.drop(columns='pruned_after'), results.drop(columns='pruned_after'),
+                                  check_dtype=False)
@@ -0,0 +1,79 @@
+# tests/test_training_modes.py
+"""The ways Model_utils.train_mode fits the windows."""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import Lasso
+
+import clean
+from model import Model
+from model_bundle import bundle_models
+from model_utils import Model_utils
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match='unknown training mode'):
+        Model(train=True, mode='warm')
+
+
+@pytest.fixture(scope='module')
+def windows(encoded_frame):
+    windows, _ = Model_utils.preprocess(encoded_frame, 2)
+    return windows
+
+
+def test_path_matches_single_fits(windows, tmp_path):
+    alphas = [1.0, 0.1, 0.01]
+    models, path_alphas, coef_path, intercept_path = Model_utils.train_path(
+        windows, str(tmp_path / 'model_{}.pkl'), alphas)
+    assert len(models) == len(windows) and list(path_alphas) == alphas
+    for i in range(len(windows)):
+        X_tr, X_te, y_tr, _ = windows[i]
+        for k, alpha in enumerate(path_alphas):
+            single = Lasso(alpha=alpha, max_iter=10_000).fit(X_tr, y_tr)
+            # the expansion has collinear columns, so compare fits rather than coefficients
+            np.testing.assert_allclose(X_te @ coef_path[i, k] + intercept_path[i, k], single.predict(X_te),
+                                       atol=1e-3)
+        # the saved model is the one at the default alpha 0.1
+        np.testing.assert_allclose(models[i].coef_, coef_path[i, 1])
+
+
+def test_warm_start_matches_cold(windows, tmp_path):
+    cold, cold_extras = Model_utils.train_mode(windows, str(tmp_path / 'cold_{}.pkl'), 'cold')
+    warm, warm_extras = Model_utils.train_mode(windows, str(tmp_path / 'warm_{}.pkl'), 'warm_start')
+    for i, (_, X_te, _, _) in enumerate(windows):
+        np.testing.assert_allclose(warm[i].predict(X_te), cold[i].predict(X_te), atol=1e-3)
+    # both modes report every window's iterations and convergence
+    for extras in (cold_extras, warm_extras):
+        report = extras['fit_report']
+        assert [entry['window'] for entry in report] == list(range(len(windows)))
+        assert all(entry['converged'] and entry['n_iter'] > 0 for entry in report)
+
+
+def test_gram_matches_direct_fits(encoded_frame, tmp_path):
+    windows, _ = Model_utils.preprocess(encoded_frame, 2, split='row')
+    models = Model_utils.train_from_stats(windows, str(tmp_path / 'model_{}.pkl'))
+    for i, (X_tr, X_te, y_tr, _) in enumerate(windows):
+        direct = Lasso(alpha=0.1, max_iter=10_000).fit(X_tr, y_tr)
+        np.testing.assert_allclose(models[i].predict(X_te), direct.predict(X_te), atol=1e-3)
+
+
+def test_loading_splits_like_the_trained_mode(encoded_frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    clean.write_encoded(encoded_frame)
+    trained = Model(train=True, mode='gram')
+    loaded = Model()
+    # row-level splits, so every window is scored on rows its gram model never saw
+    assert loaded.windows.train_mask is not None
+    np.testing.assert_allclose(loaded.test_models(), trained.test_models())
+
+
+def test_parallel_training_is_identical(windows, tmp_path):
+    artifacts = {}
+    for n_jobs in (1, 2):
+        out = tmp_path / f'jobs{n_jobs}'
+        models = Model_utils.train_windows(windows, str(out / 'model_{}.pkl'), n_jobs=n_jobs)
+        bundle_models(str(out / 'model_bundle.bin'), models, [f'f{j}' for j in range(windows.X.shape[1])])
+        artifacts[n_jobs] = {path.name: path.read_bytes() for path in out.iterdir()}
+    assert len(artifacts[1]) == len(windows) + 1
+    assert artifacts[1] == artifacts[2]